@@ -0,0 +1,188 @@
+"""
+Image and sound loading with an in-memory LRU, a background preloader and an
+on-disk cache of decoded, pre-scaled pixels.
+
+The source art is large (1024x1024 PNGs drawn at 32x32), so decoding and
+smoothscaling dominate startup. Scaled pixels are written to CACHE_DIR as raw
+RGB(A) keyed by the source file's mtime and size; later runs read those back
+instead of decoding. preload() does the decode/read on a worker thread and
+load_image() picks the result up (waiting only if it is still in flight).
+Display-format conversion always happens on the calling thread.
+"""
+import os
+import struct
+import pygame
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".assetcache")
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+SOUND_EXTS = (".wav", ".ogg", ".mp3")
+
+MAX_IMAGES = 64         # (name, size) entries kept; least recently used evicted first
+DISK_CACHE = True       # False: always decode from the source files
+
+CACHE_MAGIC = b"TFAC"
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct("<4sHHII")   # magic, version, has_alpha, w, h
+
+_manifest = None        # lower-case basename -> {ext: path}, listed once
+_images = OrderedDict() # (name, size) -> Surface | None   (misses cached too)
+_sounds = {}            # name -> Sound | None
+_pending = {}           # (name, size) -> Future of an unconverted Surface | None
+_loader = None          # single worker thread, started by the first preload()
+stats = {"decodes": 0, "hits": 0, "evictions": 0, "disk_hits": 0, "preloaded": 0}
+
+def manifest():
+    """One-time listing of assets/ (empty if the folder is missing)."""
+    global _manifest
+    if _manifest is None:
+        _manifest = {}
+        try:
+            files = os.listdir(ASSETS_DIR)
+        except OSError:
+            files = []
+        for fname in files:
+            root, ext = os.path.splitext(fname)
+            _manifest.setdefault(root.lower(), {})[ext.lower()] = os.path.join(ASSETS_DIR, fname)
+    return _manifest
+
+def find(name: str, exts):
+    """Path of assets/<name>.<ext> for the first ext in exts that exists, else None."""
+    entry = manifest().get(name.lower(), {})
+    for ext in exts:
+        if ext in entry:
+            return entry[ext]
+    return None
+
+# ---- Decoding (thread-safe: no display access) ----
+def _cache_path(path, size, st):
+    root = os.path.splitext(os.path.basename(path))[0].lower()
+    dims = f"{size[0]}x{size[1]}" if size else "full"
+    return os.path.join(CACHE_DIR, f"{root}-{dims}-{st.st_mtime_ns:x}-{st.st_size:x}.raw")
+
+def _read_cached(cpath):
+    try:
+        with open(cpath, "rb") as f:
+            blob = f.read()
+    except OSError:
+        return None
+    if len(blob) < CACHE_HEADER.size:
+        return None
+    magic, version, alpha, w, h = CACHE_HEADER.unpack_from(blob)
+    fmt = "RGBA" if alpha else "RGB"
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or len(blob) != CACHE_HEADER.size + w*h*len(fmt):
+        return None
+    return pygame.image.frombytes(blob[CACHE_HEADER.size:], (w, h), fmt)
+
+def _write_cached(cpath, surf):
+    alpha = bool(surf.get_flags() & pygame.SRCALPHA)
+    w, h = surf.get_size()
+    tmp = cpath + ".tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, alpha, w, h))
+            f.write(pygame.image.tobytes(surf, "RGBA" if alpha else "RGB"))
+        os.replace(tmp, cpath)
+    except OSError:
+        return      # read-only checkout etc.: the cache is only an optimisation
+    # Entries for older versions of the same source and size are dead now
+    own = os.path.basename(cpath)
+    prefix = own.rsplit("-", 2)[0] + "-"
+    for fname in os.listdir(CACHE_DIR):
+        if fname.startswith(prefix) and fname != own:
+            try: os.remove(os.path.join(CACHE_DIR, fname))
+            except OSError: pass
+
+def _decode(path, size):
+    """Scaled, unconverted pixels of path: from the disk cache if current, else decoded."""
+    st = os.stat(path)
+    cpath = _cache_path(path, size, st) if DISK_CACHE else None
+    if cpath:
+        img = _read_cached(cpath)
+        if img is not None:
+            stats["disk_hits"] += 1
+            return img
+    img = pygame.image.load(path)
+    if img.get_bitsize() not in (24, 32):       # smoothscale needs 24/32-bit pixels
+        alpha = pygame.SRCALPHA if img.get_alpha() else 0
+        full = pygame.Surface(img.get_size(), alpha, 32 if alpha else 24)
+        full.blit(img, (0, 0))
+        img = full
+    if size:
+        img = pygame.transform.smoothscale(img, size)
+    stats["decodes"] += 1
+    if cpath:
+        _write_cached(cpath, img)
+    return img
+
+def _decode_or_none(path, size):
+    try:
+        return _decode(path, size)
+    except Exception:
+        return None
+
+# ---- Public API ----
+def preload(specs):
+    """Start decoding (name, size) pairs on a worker thread; load_image() collects them."""
+    global _loader
+    for name, size in specs:
+        key = (name.lower(), tuple(size) if size else None)
+        if key in _images or key in _pending:
+            continue
+        path = find(name, IMAGE_EXTS)
+        if not path:
+            continue
+        if _loader is None:
+            _loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="assets")
+        _pending[key] = _loader.submit(_decode_or_none, path, key[1])
+
+def load_image(name: str, size=None):
+    """assets/<name>.(png|jpg|jpeg|webp|bmp), converted and scaled to size; cached."""
+    key = (name.lower(), tuple(size) if size else None)
+    if key in _images:
+        _images.move_to_end(key)
+        stats["hits"] += 1
+        return _images[key]
+    fut = _pending.pop(key, None)
+    if fut is not None and not fut.cancel():
+        surf = fut.result()         # done, or running: wait for it rather than decode twice
+        stats["preloaded"] += 1
+    else:
+        path = find(name, IMAGE_EXTS)
+        surf = _decode_or_none(path, key[1]) if path else None
+    if surf is not None and pygame.display.get_surface() is not None:   # convert needs a video mode
+        surf = surf.convert_alpha() if surf.get_flags() & pygame.SRCALPHA else surf.convert()
+    _images[key] = surf
+    if len(_images) > MAX_IMAGES:
+        _images.popitem(last=False)
+        stats["evictions"] += 1
+    return surf
+
+def load_sound(name: str, volume: float = 0.6):
+    """assets/<name>.(wav|ogg|mp3) as a mixer Sound; None without audio. Cached."""
+    if name in _sounds:
+        return _sounds[name]
+    snd = None
+    path = find(name, SOUND_EXTS)
+    if path and pygame.mixer.get_init():
+        try:
+            snd = pygame.mixer.Sound(path)
+            snd.set_volume(volume)
+            print(f"[SFX] Loaded {os.path.basename(path)}")
+        except Exception as e:
+            print(f"[SFX] Failed to load {path}: {e}")
+    _sounds[name] = snd
+    return snd
+
+def clear():
+    """Drop every cached surface/sound and re-list the folder on next use."""
+    global _manifest
+    _manifest = None
+    for fut in _pending.values():
+        fut.cancel()
+    _pending.clear()
+    _images.clear()
+    _sounds.clear()
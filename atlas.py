@@ -0,0 +1,80 @@
+"""
+Sprite atlas: several small surfaces packed into shared sheets, addressed by key.
+
+Drawing many sprites becomes a single Surface.blits() call with
+(sheet, dest, source rect) triples instead of a Python-level blit per sprite.
+Sprites without per-pixel alpha go on an opaque sheet and the rest on an
+SRCALPHA one: copying from an opaque sheet is several times cheaper than
+blending the same pixels from an alpha sheet. Packing is a simple shelf packer
+(tallest first); the sprites here are a handful of tile-sized images.
+"""
+import math
+import weakref
+import pygame
+
+def _pack(items):
+    """Shelf-pack (key, surface) pairs; returns ((w, h), {key: Rect})."""
+    items = sorted(items, key=lambda kv: (-kv[1].get_height(), -kv[1].get_width()))
+    area = sum(s.get_width() * s.get_height() for _, s in items)
+    width = max([math.isqrt(area) + 1] + [s.get_width() for _, s in items])
+    rects = {}
+    x = y = shelf_h = 0
+    for key, surf in items:
+        w, h = surf.get_size()
+        if x + w > width:
+            x, y, shelf_h = 0, y + shelf_h, 0
+        rects[key] = pygame.Rect(x, y, w, h)
+        x += w
+        shelf_h = max(shelf_h, h)
+    return (width, y + shelf_h), rects
+
+class Atlas:
+    def __init__(self, images: dict):
+        """images: key -> Surface; None values are skipped (missing assets)."""
+        self.sheets = []
+        self.rects = {}
+        self._src = {}          # key -> (sheet, rect)
+        converted = pygame.display.get_surface() is not None
+        for alpha in (False, True):
+            group = [(k, s) for k, s in images.items()
+                     if s is not None and bool(s.get_flags() & pygame.SRCALPHA) == alpha]
+            if not group:
+                continue
+            size, rects = _pack(group)
+            sheet = pygame.Surface(size, pygame.SRCALPHA if alpha else 0, 32)
+            for key, surf in group:
+                # BLEND_RGBA_MAX onto the zeroed sheet copies pixels and alpha unchanged
+                sheet.blit(surf, rects[key], special_flags=pygame.BLEND_RGBA_MAX if alpha else 0)
+            if converted:
+                sheet = sheet.convert_alpha() if alpha else sheet.convert()
+            self.sheets.append(sheet)
+            self.rects.update(rects)
+            self._src.update((k, (sheet, r)) for k, r in rects.items())
+
+    def __contains__(self, key):
+        return key in self._src
+
+    def get(self, key):
+        """Subsurface view of one sprite (shares the sheet's pixels), or None."""
+        src = self._src.get(key)
+        return src[0].subsurface(src[1]) if src else None
+
+    def blits(self, dst: pygame.Surface, items) -> None:
+        """Draw (key, dest) pairs onto dst in one call; keys must be in the atlas."""
+        src = self._src
+        dst.blits([(src[key][0], dest, src[key][1]) for key, dest in items], doreturn=False)
+
+
+# identity of the source surfaces -> Atlas; an atlas lives while some Level uses it,
+# so sources the assets LRU evicted are freed with the last Level drawing them
+_shared = weakref.WeakValueDictionary()
+
+def shared(images: dict) -> Atlas:
+    """One Atlas per distinct set of source surfaces (assets.load_image hands out the
+    same objects for the same name and size, so every Level of a tile size shares one)."""
+    key = tuple((k, id(s)) for k, s in images.items())
+    atlas = _shared.get(key)
+    if atlas is None:
+        atlas = _shared[key] = Atlas(images)
+        atlas.sources = dict(images)    # keeps the ids in key unique while the atlas lives
+    return atlas
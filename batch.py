@@ -0,0 +1,308 @@
+"""
+Vectorised batch environment: N independent worlds stepped together with NumPy.
+
+Every world is the same game as session.GameSession (level grid, player, two
+monsters, idle counter, lives) stored as struct-of-arrays buffers. One call to
+step(actions) applies the axis-locked movement, wall collision, pickups,
+monster steering, lava / catch / idle rules and win/lose for all worlds and
+matches GameSession tick for tick (see check_against_session).
+
+Actions are LEFT|RIGHT|UP|DOWN masks (session.LEFT ...), one uint8 per world.
+
+Throughput (measure_throughput) is about 1.5k world-steps per millisecond on
+one core for 10k-50k worlds, roughly 100x GameSession. The planning target is
+1k+/ms; 10k/ms is out of reach for NumPy here: a step is ~150 whole-array
+passes, a third of the time goes to the monster BFS and most of the rest to
+the row gathers of the wall tests.
+"""
+import numpy as np
+
+from level import Level, LEMON_PAD_COLLISION
+from player import HITBOX_SIZE
+from session import (ENEMY_SPAWNS, ENEMY_SPEED, ENEMY_SPEED_RAMP, RAMP_EVERY, IDLE_LIMIT_FRAMES, MAX_LIVES, PLAYER_SPEED,
+                     LEFT, RIGHT, UP, DOWN, TILE)
+
+STATUS_PLAYING, STATUS_WON, STATUS_LOST = 0, 1, 2
+
+
+class BatchEnv:
+    def __init__(self, levels, enemy_spawns=ENEMY_SPAWNS):
+        lv0 = levels[0]
+        self.n = n = len(levels)
+        self.tile = T = lv0.TILE
+        self.cols, self.rows = C, R = lv0.cols, lv0.rows
+        assert HITBOX_SIZE <= T, "corner tests assume a hitbox spans at most 2x2 tiles"
+        assert C <= 32, "passability rows are packed into uint32 bitmasks"
+
+        grid = np.stack([np.frombuffer(lv.map_data.data, dtype=np.uint8).reshape(R, C) for lv in levels])
+        # Every tile bitmap is one uint32 per map row (bit x = column x), flattened to
+        # (n*rows,) so world w's row y lives at w*rows + y. Small enough to stay in cache.
+        self._bit = (np.uint32(1) << np.arange(32, dtype=np.uint32))
+        def rows_of(mask):
+            return (mask * self._bit[:C]).sum(axis=2, dtype=np.uint32).reshape(-1)
+        self.walls = rows_of(grid == 1)
+        self.lava = rows_of(grid == 3)
+        self.exits = rows_of(grid == 4)
+        self.items0 = rows_of(grid == 2)
+        self.pass_rows = rows_of(grid != 1).reshape(n, R)   # for the bit-parallel BFS
+
+        i32 = np.int32
+        self.start_x = np.array([lv.start_x for lv in levels], dtype=i32)
+        self.start_y = np.array([lv.start_y for lv in levels], dtype=i32)
+        self.spawn_x = np.array([T*tx for tx, _ in enemy_spawns], dtype=i32)
+        self.spawn_y = np.array([T*ty for _, ty in enemy_spawns], dtype=i32)
+        self.e = len(enemy_spawns)
+        self._w = np.arange(n, dtype=i32)
+        self._rbase = self._w * R
+        self._shift = T.bit_length() - 1 if T & (T - 1) == 0 else None
+        self.reset()
+
+    @classmethod
+    def from_seeds(cls, seeds, tile_size=TILE):
+        return cls([Level(tile_size=tile_size, seed=s) for s in seeds])
+
+    def reset(self):
+        n, e, i32 = self.n, self.e, np.int32
+        self.items = self.items0.copy()
+        self.px = self.start_x.copy()
+        self.py = self.start_y.copy()
+        self.ex = np.broadcast_to(self.spawn_x, (n, e)).copy()
+        self.ey = np.broadcast_to(self.spawn_y, (n, e)).copy()
+        self.enext = np.full((n, e), -1, dtype=i32)        # committed tile index, -1 = none
+        self.espeed = np.full(n, float(ENEMY_SPEED))
+        self.score = np.zeros(n, dtype=i32)
+        self.lives = np.full(n, MAX_LIVES, dtype=i32)
+        self.idle = np.zeros(n, dtype=i32)
+        self.status = np.zeros(n, dtype=np.int8)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.last_rule = np.zeros(n, dtype=np.int8)        # rule broken this tick (0 = none)
+
+    # ---- Terrain ----
+    def _tdiv(self, v):
+        """v // tile (shift when the tile size is a power of two; same floor semantics)."""
+        return v >> self._shift if self._shift is not None else v // self.tile
+
+    def _test(self, rows, tx, ty, rbase):
+        """Bit (tx, ty) of a row bitmap; tx/ty must be on the map."""
+        return (rows.take(rbase + ty) & self._bit.take(tx)) != 0
+
+    def _hits(self, rows, x, y, w=HITBOX_SIZE):
+        """Per-entry Level.box_hits_wall for boxes (x, y, w, w); x/y shaped (n,) or (n, e)."""
+        C, R = self.cols, self.rows
+        x0, x1 = self._tdiv(x), self._tdiv(x + (w - 1))
+        y0, y1 = self._tdiv(y), self._tdiv(y + (w - 1))
+        rbase = self._rbase if x.ndim == 1 else self._rbase[:, None]
+        if x0.min() >= 0 and y0.min() >= 0 and x1.max() < C and y1.max() < R:
+            bits = self._bit.take(x0) | self._bit.take(x1)
+            return ((rows.take(rbase + y0) | rows.take(rbase + y1)) & bits) != 0
+        # Slow path: boxes partly off the map (clamped like Level.tile_range)
+        x0 = np.maximum(x0, 0); x1 = np.minimum(x1, C - 1)
+        y0 = np.maximum(y0, 0); y1 = np.minimum(y1, R - 1)
+        valid = (x0 <= x1) & (y0 <= y1)
+        x0 = np.minimum(x0, C - 1); x1 = np.maximum(x1, 0)
+        y0 = np.minimum(y0, R - 1); y1 = np.maximum(y1, 0)
+        bits = self._bit.take(x0) | self._bit.take(x1)
+        return valid & (((rows.take(rbase + y0) | rows.take(rbase + y1)) & bits) != 0)
+
+    def _center_tile(self, x, y):
+        half = HITBOX_SIZE // 2
+        return self._tdiv(x + half), self._tdiv(y + half)
+
+    # ---- Monster steering (Level.next_step without building full fields) ----
+    def _decide(self, worlds, my_x, my_y, goal_x, goal_y):
+        """Next tile index (or -1) per query, as Level.next_step would pick it.
+
+        One bit-parallel BFS per distinct world, outward from the goal a layer
+        at a time. A query resolves on the layer d that first reaches its tile:
+        the answer is its first neighbour (+x, -x, +y, -y) reached by layer d-1.
+        Worlds drop out of the search as soon as all their queries resolve."""
+        C, R = self.cols, self.rows
+        bit = self._bit
+        result = np.full(len(worlds), -1, dtype=np.int32)
+        uw, qslot = np.unique(worlds, return_inverse=True)
+        m = len(uw)
+        P = self.pass_rows[uw]
+        gx, gy = goal_x[uw], goal_y[uw]
+        gin = (gx >= 0) & (gx < C) & (gy >= 0) & (gy < R)
+        gyc = np.minimum(np.maximum(gy, 0), R - 1)
+        V = np.zeros_like(P)
+        V[np.arange(m), gyc] = np.where(gin, bit.take(np.minimum(np.maximum(gx, 0), C - 1)), 0) \
+            & P[np.arange(m), gyc]
+        F = V.copy()
+
+        # Open queries (off-map monsters never resolve, like Level.next_step)
+        q = np.flatnonzero((my_x >= 0) & (my_x < C) & (my_y >= 0) & (my_y < R))
+        qs, qx, qy = qslot[q], my_x[q], my_y[q]
+        prev = None
+        while len(q):
+            found = (V[qs, qy] & bit.take(qx)) != 0
+            if found.any():
+                if prev is not None:                # d >= 1: first neighbour at d-1
+                    fs, fx, fy = qs[found], qx[found], qy[found]
+                    pick = np.full(len(fs), -1, dtype=np.int32)
+                    for nx, ny in ((fx + 1, fy), (fx - 1, fy), (fx, fy + 1), (fx, fy - 1)):
+                        ok = (pick < 0) & (nx >= 0) & (nx < C) & (ny >= 0) & (ny < R)
+                        nxc, nyc = np.minimum(np.maximum(nx, 0), C - 1), np.minimum(np.maximum(ny, 0), R - 1)
+                        ok &= (prev[fs, nyc] & bit.take(nxc)) != 0
+                        pick[ok] = (nyc*C + nxc)[ok]
+                    result[q[found]] = pick
+                keep = ~found                       # d == 0 (at the goal) stays -1
+                q, qs, qx, qy = q[keep], qs[keep], qx[keep], qy[keep]
+                if not len(q): break
+                # Compact the search to worlds that still have open queries
+                live, qs = np.unique(qs, return_inverse=True)
+                P, V, F = P[live], V[live], F[live]
+            if not F.any():
+                break
+            prev = V.copy()
+            nb = (F << np.uint32(1)) | (F >> np.uint32(1))
+            nb[:, 1:] |= F[:, :-1]
+            nb[:, :-1] |= F[:, 1:]
+            F = nb & P & ~V
+            V |= F
+        return result
+
+    # ---- Tick ----
+    def step(self, actions):
+        T, C, R = self.tile, self.cols, self.rows
+        a = np.asarray(actions, dtype=np.uint8)
+        alive = self.status == STATUS_PLAYING
+        rb = self._rbase
+        half = HITBOX_SIZE // 2
+
+        # Player: axis-locked movement with per-axis wall rollback
+        h = (((a & RIGHT) != 0).astype(np.int32) - ((a & LEFT) != 0)) * PLAYER_SPEED
+        v = (((a & DOWN) != 0).astype(np.int32) - ((a & UP) != 0)) * PLAYER_SPEED
+        v[h != 0] = 0
+        h[~alive] = 0; v[~alive] = 0
+        old_px, old_py = self.px, self.py
+        nx = self.px + h
+        px = np.where((h != 0) & ~self._hits(self.walls, nx, self.py), nx, self.px)
+        ny = self.py + v
+        py = np.where((v != 0) & ~self._hits(self.walls, px, ny), ny, self.py)
+        self.px, self.py = px, py
+
+        # Pickup: first lemon (row-major) whose padded rect overlaps the player
+        pad, size = LEMON_PAD_COLLISION, T - 2*LEMON_PAD_COLLISION
+        x0, x1 = self._tdiv(px), self._tdiv(px + (HITBOX_SIZE - 1))
+        y0, y1 = self._tdiv(py), self._tdiv(py + (HITBOX_SIZE - 1))
+        x0 = np.maximum(x0, 0); y0 = np.maximum(y0, 0)
+        x1 = np.minimum(x1, C - 1); y1 = np.minimum(y1, R - 1)
+        picked = np.zeros(self.n, dtype=bool)
+        for tx, ty in ((x0, y0), (x1, y0), (x0, y1), (x1, y1)):
+            ix, iy = tx*T + pad, ty*T + pad
+            hit = (alive & ~picked & (px < ix + size) & (ix < px + HITBOX_SIZE)
+                   & (py < iy + size) & (iy < py + HITBOX_SIZE) & self._test(self.items, tx, ty, rb))
+            if hit.any():
+                r = rb[hit] + ty[hit]
+                self.items[r] &= ~self._bit[tx[hit]]
+                picked |= hit
+        self.score += picked
+        moved = (px != old_px) | (py != old_py)
+
+        # Monsters: choose a new tile on arrival, then steer towards its centre
+        gx, gy = self._center_tile(px, py)
+        need = alive[:, None] & (self.enext < 0)
+        if need.any():
+            qw, qe = np.nonzero(need)
+            mx, my = self._center_tile(self.ex[qw, qe], self.ey[qw, qe])
+            self.enext[qw, qe] = self._decide(qw, mx, my, gx, gy)
+        act = alive[:, None] & (self.enext >= 0)
+        tcx = (self.enext % C)*T + T//2
+        tcy = (self.enext // C)*T + T//2
+        dx, dy = tcx - (self.ex + half), tcy - (self.ey + half)
+        dist = np.maximum(1.0, np.sqrt((dx*dx + dy*dy).astype(np.float64)))
+        spd = self.espeed[:, None]
+        adx, ady = np.abs(dx), np.abs(dy)
+        sx = np.minimum(np.maximum(np.trunc(spd*dx/dist).astype(np.int32), -adx), adx)
+        sy = np.minimum(np.maximum(np.trunc(spd*dy/dist).astype(np.int32), -ady), ady)
+        sx[~act] = 0; sy[~act] = 0
+        nx = self.ex + sx
+        ex = np.where((sx != 0) & ~self._hits(self.walls, nx, self.ey), nx, self.ex)
+        ny = self.ey + sy
+        ey = np.where((sy != 0) & ~self._hits(self.walls, ex, ny), ny, self.ey)
+        self.ex, self.ey = ex, ey
+        arrived = act & (np.abs(ex + half - tcx) <= 1) & (np.abs(ey + half - tcy) <= 1)
+        self.enext[arrived] = -1
+
+        # Rule 1: lava under the player's centre
+        inb = (gx >= 0) & (gx < C) & (gy >= 0) & (gy < R)
+        gxc, gyc = np.minimum(np.maximum(gx, 0), C - 1), np.minimum(np.maximum(gy, 0), R - 1)
+        lava = inb & self._test(self.lava, gxc, gyc, rb)
+        # Rule 2: any monster overlaps the player
+        caught = ((np.abs(ex - px[:, None]) < HITBOX_SIZE) & (np.abs(ey - py[:, None]) < HITBOX_SIZE)).any(axis=1)
+        # Rule 3: no camping
+        self.idle = np.where(moved, 0, self.idle + alive)
+        idle = self.idle > IDLE_LIMIT_FRAMES
+
+        # Difficulty ramp
+        if picked.any():
+            self.espeed[picked] = ENEMY_SPEED + ENEMY_SPEED_RAMP * (self.score[picked] // RAMP_EVERY)
+
+        # Penalties: the last rule checked wins the message, as in Rules.break_rule
+        rule = np.where(idle, 3, np.where(caught, 2, np.where(lava, 1, 0))).astype(np.int8)
+        rule[~alive] = 0
+        broken = rule > 0
+        self.last_rule = rule
+        self.lives -= broken
+        if broken.any():
+            soft = broken & (self.lives > 0)
+            items, items0 = self.items.reshape(self.n, R), self.items0.reshape(self.n, R)
+            items[soft] = items0[soft]
+            self.px[soft] = self.start_x[soft]
+            self.py[soft] = self.start_y[soft]
+            self.ex[soft] = self.spawn_x
+            self.ey[soft] = self.spawn_y
+            self.enext[soft] = -1
+            self.idle[soft] = 0
+            self.status[broken & (self.lives <= 0)] = STATUS_LOST
+
+        # Win condition
+        win = alive & (self.status == STATUS_PLAYING) & self._hits(self.exits, self.px, self.py)
+        self.status[win] = STATUS_WON
+        self.ticks += alive
+        return broken
+
+
+def check_against_session(n_worlds=64, ticks=2000, seed=0):
+    """Step BatchEnv and GameSession side by side with random inputs; raise on divergence."""
+    import random
+    from session import GameSession, Keys, PLAYING
+    rnd = random.Random(seed)
+    seeds = list(range(seed, seed + n_worlds))
+    env = BatchEnv.from_seeds(seeds)
+    sessions = [GameSession(seed=s) for s in seeds]
+    acts = np.zeros(n_worlds, dtype=np.uint8)
+    status_code = {PLAYING: STATUS_PLAYING, "won": STATUS_WON, "lost": STATUS_LOST}
+    for t in range(ticks):
+        for i in range(n_worlds):
+            if rnd.random() < 0.05:
+                acts[i] = rnd.choice((0, LEFT, RIGHT, UP, DOWN, LEFT | UP, RIGHT | DOWN))
+        env.step(acts)
+        for i, s in enumerate(sessions):
+            s.step(Keys.from_mask(int(acts[i])))
+            got = (int(env.px[i]), int(env.py[i]), int(env.score[i]), int(env.lives[i]),
+                   int(env.idle[i]), int(env.status[i]),
+                   [(int(x), int(y)) for x, y in zip(env.ex[i], env.ey[i])])
+            want = (s.player.rect.x, s.player.rect.y, s.rules.score, s.lives, s.idle_frames,
+                    status_code[s.status], [(e.rect.x, e.rect.y) for e in s.enemies])
+            if got != want:
+                raise AssertionError(f"world {i} diverged at tick {t + 1}: {got} != {want}")
+    return True
+
+
+def measure_throughput(n_worlds=20000, ticks=200, layouts=64, seed=0):
+    """World-steps per millisecond of step() with random held inputs (layouts distinct maps)."""
+    import time
+    levels = [Level(seed=s) for s in range(seed, seed + layouts)]
+    env = BatchEnv([levels[i % layouts] for i in range(n_worlds)])
+    rnd = np.random.default_rng(seed)
+    choices = np.array([0, LEFT, RIGHT, UP, DOWN], dtype=np.uint8)
+    acts = rnd.choice(choices, n_worlds)
+    env.step(acts)
+    t0 = time.perf_counter()
+    for t in range(ticks):
+        if t % 20 == 0:
+            acts = rnd.choice(choices, n_worlds)
+        env.step(acts)
+    return n_worlds * ticks / ((time.perf_counter() - t0) * 1000)
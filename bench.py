@@ -0,0 +1,263 @@
+"""
+Benchmark suite for the hot paths, headless (SDL_VIDEODRIVER=dummy).
+
+Cases (per map size unless noted):
+  level_init (generation + validation), box_hits_wall, pickup (Rules.track
+  along a walk), level_draw, distance_field, next_step, enemy_update,
+  and frame/<k> = one full headless frame
+  (session.step + draw) with k = 2, 20, 200 enemies in stress mode;
+  frame_sep/200 also keeps the monsters apart.
+
+Each case is calibrated so one repetition takes >= MIN_REP_S, then repeated
+with the GC off; the reported number is the median time per operation with
+its median absolute deviation. Results can be saved as a baseline and later
+runs compared against it.
+
+    python bench.py [--quick] [-k SUBSTR] [--save [FILE]] [--baseline FILE]
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import gc
+import sys
+import json
+import math
+import random
+import platform
+import statistics
+import time
+
+import pygame
+import levelgen
+from level import Level
+from enemy import Enemy
+from camera import Camera
+from player import Player
+from rules import Rules
+from pathfinding import distance_field
+from session import GameSession, Keys, LEFT, RIGHT, UP, DOWN
+
+SIZES = (20, 100, 250, 500)
+QUICK_SIZES = (20, 100)
+FRAME_ENEMIES = (2, 20, 200)
+FRAME_MAP = 64                  # map side for the full-frame cases
+BASELINE = "bench_baseline.json"
+MIN_REP_S = 0.02                # calibrate inner loops to at least this per repetition
+TARGET_S = 0.5                  # aim for this much timing per case
+MIN_REPS, MAX_REPS = 5, 25
+REGRESSION = 0.15               # slower than baseline by more than this (and the noise) = regression
+
+VIEW = (640, 480)
+
+# ---- Timing ----
+def measure(op, setup=None):
+    """Median and MAD seconds per call of op() (setup() runs untimed before each repetition)."""
+    if setup: setup()
+    t0 = time.perf_counter(); op(); once = time.perf_counter() - t0
+    inner = max(1, math.ceil(MIN_REP_S / max(once, 1e-9)))
+    reps = max(MIN_REPS, min(MAX_REPS, int(TARGET_S / max(once * inner, 1e-9))))
+    samples = []
+    gc_was = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(reps):
+            if setup: setup()
+            t0 = time.perf_counter()
+            for _ in range(inner):
+                op()
+            samples.append((time.perf_counter() - t0) / inner)
+    finally:
+        if gc_was: gc.enable()
+    med = statistics.median(samples)
+    mad = statistics.median(abs(s - med) for s in samples)
+    return med, mad
+
+# ---- Fixtures ----
+def make_level(size, seed=1):
+    return Level(map_data=levelgen.generate(seed, size, size))
+
+def random_rects(level, n, seed=0, size=30):
+    rnd = random.Random(seed)
+    w, h = level.cols * level.TILE, level.rows * level.TILE
+    return [pygame.Rect(rnd.randrange(w - size), rnd.randrange(h - size), size, size) for _ in range(n)]
+
+def far_free_tile(level):
+    """Free tile farthest (in BFS steps) from the start, for long path searches."""
+    field = level.distance_field(level.start_tile)
+    i = max(range(len(field)), key=field.__getitem__)
+    return i % level.cols, i // level.cols
+
+def walk(level, n, step=2, size=30):
+    """n player positions sweeping the map row band by row band, step px apart."""
+    w = level.cols * level.TILE - size
+    out, x, y = [], 0, 0
+    for _ in range(n):
+        out.append((x, y))
+        x += step
+        if x > w:
+            x, y = 0, (y + level.TILE) % (level.rows * level.TILE - size)
+    return out
+
+# ---- Cases ----
+def case_level_init(size):
+    return lambda: Level(seed=1, cols=size, rows=size), None
+
+def case_box_hits_wall(size):
+    level = make_level(size)
+    boxes = [tuple(r) for r in random_rects(level, 1000)]
+    def op():
+        for x, y, w, h in boxes: level.box_hits_wall(x, y, w, h)
+    return op, None
+
+def case_pickup(size):
+    level = make_level(size)
+    rules, player = Rules(), Player(0, 0)
+    path = walk(level, 1000)
+    lemons = bytes(level.item_mask)
+    def op():
+        # Tile events and lemon pickups, as player.update() drives them each tick
+        for xy in path:
+            player.pos = xy
+            rules.track(player, "player", level)
+        level.item_mask[:] = lemons            # put the lemons back for the next call
+        level.items_left = level.item_mask.count(1)
+        level._picked_cells.clear()
+        rules.reset_run_state()
+        rules.untrack(player)
+    return op, None
+
+def case_level_draw(size):
+    level = make_level(size)
+    screen = pygame.Surface(VIEW)
+    cam = Camera(*VIEW, level.cols * level.TILE, level.rows * level.TILE)
+    target = pygame.Rect(0, 0, 30, 30)
+    step = [0]
+    def op():
+        # Diagonal scroll, 4 px per frame, wrapping: includes chunk builds and evictions
+        step[0] += 1
+        target.x = (step[0] * 4) % (level.cols * level.TILE)
+        target.y = (step[0] * 3) % (level.rows * level.TILE)
+        cam.follow(target)
+        level.draw(screen, cam)
+        level.take_dirty()
+    return op, None
+
+def case_distance_field(size):
+    level = make_level(size)
+    goal = far_free_tile(level)
+    return lambda: distance_field(level.cols, level.rows, level.wall_mask, goal), None
+
+def case_next_step(size):
+    level = make_level(size)
+    goal = far_free_tile(level)
+    level.distance_field(goal)                  # every enemy reads the one cached field
+    T = level.TILE
+    tiles = [((x + T//2) // T, (y + T//2) // T) for x, y in walk(level, 1000, step=T)]
+    def op():
+        for t in tiles: level.next_step(t, goal)
+    return op, None
+
+def case_enemy_update(size):
+    level = make_level(size)
+    T = level.TILE
+    gx, gy = far_free_tile(level)
+    player = pygame.Rect(gx*T, gy*T, 30, 30)
+    enemies = []
+    def setup():
+        enemies[:] = [Enemy(level.start_x, level.start_y, T, speed=2.0)]
+    def op():
+        enemies[0].update(level, player)
+    return op, setup
+
+def case_frame(n_enemies, separation=False):
+    session = GameSession(seed=1, cols=FRAME_MAP, rows=FRAME_MAP, enemy_count=n_enemies, separation=separation)
+    screen = pygame.Surface(VIEW)
+    level = session.level
+    cam = Camera(*VIEW, level.cols * level.TILE, level.rows * level.TILE)
+    rnd = random.Random(0)
+    masks = [rnd.choice((LEFT, RIGHT, UP, DOWN)) for _ in range(64)]
+    tick = [0]
+    def setup():
+        session.new_run(seed=1)
+        session.lives = 10**9            # keep running through catches
+    def op():
+        tick[0] += 1
+        session.step(Keys.from_mask(masks[tick[0] // 20 % len(masks)]))
+        cam.follow(session.player.rect)
+        screen.fill((0, 0, 0))
+        session.level.draw(screen, cam)
+        session.level.draw_actors(screen, [*session.enemies, session.player], cam)
+    return op, setup
+
+def cases(sizes):
+    for name, make in (("level_init", case_level_init), ("box_hits_wall", case_box_hits_wall),
+                       ("pickup", case_pickup), ("level_draw", case_level_draw),
+                       ("distance_field", case_distance_field), ("next_step", case_next_step),
+                       ("enemy_update", case_enemy_update)):
+        for size in sizes:
+            yield f"{name}/{size}", (lambda make=make, size=size: make(size))
+    for k in FRAME_ENEMIES:
+        yield f"frame/{k}", (lambda k=k: case_frame(k))
+    yield f"frame_sep/{FRAME_ENEMIES[-1]}", (lambda: case_frame(FRAME_ENEMIES[-1], separation=True))
+
+# ---- Baseline ----
+def compare(results, baseline):
+    """Lines for cases in both runs; returns (lines, regressed names)."""
+    lines, regressed = [], []
+    for name, (med, mad) in results.items():
+        if name not in baseline["results"]:
+            continue
+        b_med, b_mad = baseline["results"][name]
+        ratio = med / b_med if b_med else float("inf")
+        noise = 3 * (mad + b_mad)
+        flag = ""
+        if med - b_med > max(REGRESSION * b_med, noise):
+            flag = "  SLOWER"; regressed.append(name)
+        elif b_med - med > max(REGRESSION * b_med, noise):
+            flag = "  faster"
+        lines.append(f"{name:<24} {b_med*1e3:11.4f} {med*1e3:11.4f} {ratio:7.2f}x{flag}")
+    return lines, regressed
+
+def main(argv):
+    sizes = QUICK_SIZES if "--quick" in argv else SIZES
+    pattern = argv[argv.index("-k") + 1] if "-k" in argv else ""
+    save = None
+    if "--save" in argv:
+        i = argv.index("--save")
+        save = argv[i + 1] if i + 1 < len(argv) and not argv[i + 1].startswith("-") else BASELINE
+    baseline_path = argv[argv.index("--baseline") + 1] if "--baseline" in argv else BASELINE
+
+    pygame.display.init()
+    pygame.display.set_mode(VIEW)
+
+    results = {}
+    print(f"{'case':<24} {'median ms':>11} {'mad ms':>9}")
+    for name, make in cases(sizes):
+        if pattern not in name:
+            continue
+        op, setup = make()
+        med, mad = measure(op, setup)
+        results[name] = (med, mad)
+        print(f"{name:<24} {med*1e3:11.4f} {mad*1e3:9.4f}", flush=True)
+
+    status = 0
+    if save:
+        with open(save, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "pygame": pygame.version.ver,
+                       "machine": platform.machine(), "results": results}, f, indent=1)
+        print(f"\nbaseline saved to {save}")
+    elif os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines, regressed = compare(results, baseline)
+        print(f"\nvs {baseline_path}\n{'case':<24} {'base ms':>11} {'now ms':>11} {'ratio':>8}")
+        print("\n".join(lines))
+        if regressed:
+            print(f"\n{len(regressed)} regression(s): {', '.join(regressed)}")
+            status = 1
+    pygame.quit()
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,104 @@
+"""
+Pathfinding benchmark: plain BFS vs fresh A* vs incremental path repair.
+
+A monster chases a randomly walking player across big, mostly open maps.
+Every iteration the player moves one tile and the monster takes one tile step,
+then each planner produces the monster's next step.
+
+    python bench_pathfinding.py [size ...]
+"""
+import sys
+import time
+import random
+from types import SimpleNamespace
+
+from collections import deque
+
+from pathfinding import astar, IncrementalPlanner
+
+WALL_DENSITY = 0.10
+ITERATIONS = 60
+
+def make_grid(cols, rows, seed=0):
+    rnd = random.Random(seed)
+    map_data = [[1]*cols]
+    for _ in range(rows - 2):
+        map_data.append([1] + [1 if rnd.random() < WALL_DENSITY else 0 for _ in range(cols - 2)] + [1])
+    map_data.append([1]*cols)
+    walls = bytearray(t == 1 for row in map_data for t in row)
+    return SimpleNamespace(cols=cols, rows=rows, map_data=map_data, wall_mask=walls)
+
+def bfs_path(grid, start_t, goal_t):
+    """Baseline: the monsters' original per-enemy BFS (tile dicts), [start, ..., goal] or []."""
+    rows, cols = len(grid.map_data), len(grid.map_data[0])
+    inb = lambda t: 0 <= t[1] < rows and 0 <= t[0] < cols
+    passable = lambda t: grid.map_data[t[1]][t[0]] != 1
+
+    q, prev = deque([start_t]), {start_t: None}
+    while q:
+        cur = q.popleft()
+        if cur == goal_t: break
+        x, y = cur
+        for nx, ny in ((x+1,y),(x-1,y),(x,y+1),(x,y-1)):
+            nt = (nx, ny)
+            if inb(nt) and passable(nt) and nt not in prev:
+                prev[nt] = cur
+                q.append(nt)
+
+    if goal_t not in prev: return []
+    path, t = [], goal_t
+    while t is not None:
+        path.append(t); t = prev[t]
+    path.reverse()
+    return path
+
+def chase_script(grid, seed=0):
+    """Positions (monster, player) per iteration, fixed up front so every planner sees the same run."""
+    rnd = random.Random(seed)
+    def free(t): return not grid.wall_mask[t[1]*grid.cols + t[0]]
+    me, ply = (1, 1), (grid.cols - 2, grid.rows - 2)
+    for t in (me, ply):
+        grid.map_data[t[1]][t[0]] = 0
+        grid.wall_mask[t[1]*grid.cols + t[0]] = 0
+    steps = []
+    for _ in range(ITERATIONS):
+        steps.append((me, ply))
+        x, y = ply
+        moves = [m for m in ((x+1,y),(x-1,y),(x,y+1),(x,y-1)) if free(m)]
+        if moves: ply = rnd.choice(moves)
+        path = astar(grid.cols, grid.rows, grid.wall_mask, me, ply)
+        if len(path) > 1: me = path[1]
+    return steps
+
+def run_bfs(grid, steps):
+    for me, ply in steps:
+        bfs_path(grid, me, ply)
+
+def run_astar(grid, steps):
+    for me, ply in steps:
+        astar(grid.cols, grid.rows, grid.wall_mask, me, ply)
+
+def run_incremental(grid, steps):
+    planner = IncrementalPlanner(grid.cols, grid.rows, grid.wall_mask)
+    for me, ply in steps:
+        planner.step(me, ply)
+
+def bench(size):
+    grid = make_grid(size, size)
+    steps = chase_script(grid)
+    row = [f"{size}x{size}"]
+    for fn in (run_bfs, run_astar, run_incremental):
+        t0 = time.perf_counter()
+        fn(grid, steps)
+        row.append((time.perf_counter() - t0) * 1000 / len(steps))
+    return row
+
+def main(argv):
+    sizes = [int(a) for a in argv] or [20, 100, 250, 500]
+    print(f"{'map':>10} {'BFS ms':>10} {'A* ms':>10} {'repair ms':>10}   (per planning step)")
+    for size in sizes:
+        name, *times = bench(size)
+        print(f"{name:>10} " + " ".join(f"{t:10.3f}" for t in times))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
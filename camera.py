@@ -0,0 +1,32 @@
+import pygame
+
+class Camera:
+    """
+    The visible window onto the world, in world pixels.
+
+    follow() centres a target and clamps to the world edges (a world smaller
+    than the view stays at the top-left). Draw code subtracts `offset` and
+    skips anything that does not intersect `rect`.
+    """
+
+    def __init__(self, view_w: int, view_h: int, world_w: int, world_h: int):
+        self.rect = pygame.Rect(0, 0, view_w, view_h)
+        self.world_w, self.world_h = world_w, world_h
+
+    @property
+    def offset(self):
+        return self.rect.x, self.rect.y
+
+    def follow(self, target: pygame.Rect) -> bool:
+        """Centre on target; True if the view moved."""
+        x = min(max(target.centerx - self.rect.w // 2, 0), max(self.world_w - self.rect.w, 0))
+        y = min(max(target.centery - self.rect.h // 2, 0), max(self.world_h - self.rect.h, 0))
+        moved = (x, y) != self.rect.topleft
+        self.rect.topleft = (x, y)
+        return moved
+
+    def visible(self, rect: pygame.Rect) -> bool:
+        return self.rect.colliderect(rect)
+
+    def to_screen(self, rect: pygame.Rect) -> pygame.Rect:
+        return rect.move(-self.rect.x, -self.rect.y)
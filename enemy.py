@@ -1,104 +1,163 @@
-import os
+import math
 import pygame
-from collections import deque
+from entities import ActorStore, ActorView, NO_TILE
+from pathfinding import astar, IncrementalPlanner
 
 TILE_VISUAL = 32
 HITBOX_SIZE = 30
-
-def _load_sprite(basename: str, size):
-    base = os.path.dirname(os.path.abspath(__file__))
-    assets = os.path.join(base, "assets")
-    if not os.path.isdir(assets):
-        return None
-    exts = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
-    for fname in os.listdir(assets):
-        root, ext = os.path.splitext(fname)
-        if root.lower() == basename.lower() and ext.lower() in exts:
-            path = os.path.join(assets, fname)
-            try:
-                img = pygame.image.load(path)
-                img = img.convert_alpha() if img.get_alpha() else img.convert()
-                return pygame.transform.smoothscale(img, size)
-            except Exception:
-                return None
-    return None
-
-class Enemy:
-    """BFS pathfinding monster that chases the player around walls."""
-    def __init__(self, start_px_x: int, start_px_y: int, tile_size: int, speed: float = 2.0):
-        self.tile = tile_size
-
-        # Collision box smaller for smooth wall sliding
-        self.rect = pygame.Rect(start_px_x, start_px_y, HITBOX_SIZE, HITBOX_SIZE)
-
-        self.speed = speed
-        self._path = []
-        self._repath_cooldown = 0
-        # Draw sprite at full 32x32 (visual)
-        self.sprite = _load_sprite("monster", (TILE_VISUAL, TILE_VISUAL))
-        self.fallback_color = (200, 60, 200)
-
-    def _tile_from_px(self, x, y): return x // self.tile, y // self.tile
-    def _center_for_tile(self, tx, ty): return tx*self.tile + self.tile//2, ty*self.tile + self.tile//2
-
-    def _bfs(self, level, start_t, goal_t):
-        rows, cols = len(level.map_data), len(level.map_data[0])
-        inb = lambda t: 0 <= t[1] < rows and 0 <= t[0] < cols
-        passable = lambda t: level.map_data[t[1]][t[0]] != 1
-
-        q, prev = deque([start_t]), {start_t: None}
-        while q:
-            cur = q.popleft()
-            if cur == goal_t: break
-            x, y = cur
-            for nx, ny in ((x+1,y),(x-1,y),(x,y+1),(x,y-1)):
-                nt = (nx, ny)
-                if inb(nt) and passable(nt) and nt not in prev:
-                    prev[nt] = cur
-                    q.append(nt)
-
-        if goal_t not in prev: return []
-        path, t = [], goal_t
-        while t is not None:
-            path.append(t); t = prev[t]
-        path.reverse()
-        return path
-
-    def _ensure_path(self, level, player_rect):
-        if self._repath_cooldown > 0 and self._path:
-            self._repath_cooldown -= 1; return
-        my_t  = self._tile_from_px(self.rect.centerx, self.rect.centery)
+SPRITE = ("monster", (TILE_VISUAL, TILE_VISUAL))   # (asset, size) for assets.preload
+
+class Enemy(ActorView):
+    """Monster that chases the player around walls.
+
+    A view over one row of an ActorStore (session.py keeps one for all
+    monsters); constructing an Enemy directly gives it a private one-row store.
+
+    Planners:
+      "field"       - read the level's shared distance field (one BFS per player
+                      tile, shared by all enemies); default.
+      "astar"       - fresh A* (Manhattan heuristic) on every tile arrival.
+      "incremental" - per-enemy path repair: the previous path is trimmed or
+                      extended when the player shifts a tile and detoured
+                      locally when terrain changes; A* only when it must.
+                      For big, mostly open maps where a BFS per enemy is too slow.
+    """
+    __slots__ = ()
+    PLANNERS = ("field", "astar", "incremental")
+    SPRITE = SPRITE
+    sprite_key = SPRITE[0]      # Level.draw_actors() draws from the level's atlas
+    fallback_color = (200, 60, 200)
+
+    def __init__(self, start_px_x: int, start_px_y: int, tile_size: int, speed: float = 2.0,
+                 planner: str = "field"):
+        if planner not in self.PLANNERS:
+            raise ValueError(f"unknown planner {planner!r}")
+        store = ActorStore(Enemy, HITBOX_SIZE, tile_size)
+        store.respawn([(start_px_x, start_px_y)], speed, planner)
+        self._s, self._i = store, 0
+
+    @property
+    def tile(self):
+        return self._s.tile
+
+    @property
+    def next_tile(self):
+        """Committed tile the monster walks to, or None."""
+        x = self._s.nx[self._i]
+        return None if x == NO_TILE else (x, self._s.ny[self._i])
+
+    @next_tile.setter
+    def next_tile(self, t):
+        self._s.nx[self._i], self._s.ny[self._i] = (NO_TILE, NO_TILE) if t is None else t
+
+    @property
+    def planner(self):
+        return self._s.planner[self._i]
+
+    @planner.setter
+    def planner(self, name):
+        self._s.planner[self._i] = name
+
+    @property
+    def incr(self):
+        """IncrementalPlanner of the "incremental" planner (created on first use)."""
+        return self._s.incr[self._i]
+
+    @incr.setter
+    def incr(self, p):
+        self._s.incr[self._i] = p
+
+    @property
+    def log_pos(self):
+        """Terrain log position (Level.terrain_pos) the incremental planner has seen up to."""
+        return self._s.log_pos[self._i]
+
+    @log_pos.setter
+    def log_pos(self, n):
+        self._s.log_pos[self._i] = n
+
+    def _tile_from_px(self, x, y): return x // self._s.tile, y // self._s.tile
+    def _center_for_tile(self, tx, ty):
+        T = self._s.tile
+        return tx*T + T//2, ty*T + T//2
+
+    def plan(self, level, player_rect):
+        """Pathfinding half of update(): keep walking to the committed tile centre;
+        choose the next one on arrival."""
+        s, i = self._s, self._i
+        if s.nx[i] != NO_TILE: return
+        half = s.hitbox // 2
+        my_t  = self._tile_from_px(s.x[i] + half, s.y[i] + half)
         ply_t = self._tile_from_px(player_rect.centerx, player_rect.centery)
-        self._path = self._bfs(level, my_t, ply_t)
-        self._repath_cooldown = 12
+        planner = s.planner[i]
+        if planner == "field":
+            nxt = level.next_step(my_t, ply_t)
+        elif planner == "astar":
+            path = astar(level.cols, level.rows, level.wall_mask, my_t, ply_t)
+            nxt = path[1] if len(path) > 1 else None
+        else:
+            nxt = self._incremental_step(level, my_t, ply_t)
+        if nxt is not None:
+            s.nx[i], s.ny[i] = nxt
+
+    def _incremental_step(self, level, my_t, ply_t):
+        s, i = self._s, self._i
+        if s.incr[i] is None:
+            s.incr[i] = IncrementalPlanner(level.cols, level.rows, level.wall_mask)
+            s.log_pos[i] = level.terrain_pos
+        changed = level.terrain_changes(s.log_pos[i])
+        s.log_pos[i] = level.terrain_pos
+        return s.incr[i].step(my_t, ply_t, changed)
 
     def update(self, level, player_rect):
-        self._ensure_path(level, player_rect)
-        if len(self._path) < 2: return
-
-        nxt_t = self._path[1]
-        target_cx, target_cy = self._center_for_tile(*nxt_t)
-
-        dx = target_cx - self.rect.centerx
-        dy = target_cy - self.rect.centery
-        dist = max(1, (dx*dx + dy*dy) ** 0.5)
-        step_x = int(self.speed * dx / dist)
-        step_y = int(self.speed * dy / dist)
-
-        old_x, old_y = self.rect.x, self.rect.y
-        self.rect.x += step_x
-        if level.collides_with_wall(self.rect): self.rect.x = old_x
-        self.rect.y += step_y
-        if level.collides_with_wall(self.rect): self.rect.y = old_y
-
-        if abs(self.rect.centerx - target_cx) <= 1 and abs(self.rect.centery - target_cy) <= 1:
-            if self._path and self._path[0] != nxt_t:
-                self._path.pop(0)
-
-    def draw(self, screen):
-        if self.sprite:
-            top_left = (self.rect.centerx - TILE_VISUAL // 2,
-                        self.rect.centery - TILE_VISUAL // 2)
-            screen.blit(self.sprite, top_left)
-        else:
-            pygame.draw.rect(screen, self.fallback_color, self.rect, border_radius=4)
+        self.plan(level, player_rect)
+        self.move(level)
+
+    def move(self, level, crowd=None):
+        """Movement half of update(): step toward the committed tile. With crowd (a
+        SpatialHash of the monsters) steps into a monster not already touched are
+        refused like walls, so packs queue up instead of stacking, and the refused
+        monster drops its committed tile so the next plan() starts afresh."""
+        s, i = self._s, self._i
+        x, y = s.px[i], s.py[i] = s.x[i], s.y[i]
+        if s.nx[i] == NO_TILE: return
+
+        W = s.hitbox
+        target_cx, target_cy = self._center_for_tile(s.nx[i], s.ny[i])
+
+        dx = target_cx - (x + W//2)
+        dy = target_cy - (y + W//2)
+        dist = max(1, math.sqrt(dx*dx + dy*dy))
+        # Never overshoot the tile centre (fast monsters would oscillate around it)
+        speed = s.speed[i]
+        step_x = max(-abs(dx), min(abs(dx), int(speed * dx / dist)))
+        step_y = max(-abs(dy), min(abs(dy), int(speed * dy / dist)))
+
+        others = ()
+        if crowd is not None:
+            rect = pygame.Rect(x, y, W, W)
+            others = [pygame.Rect(o._s.x[o._i], o._s.y[o._i], W, W)
+                      for o in crowd.query(rect.inflate(2*abs(step_x) + 2, 2*abs(step_y) + 2))
+                      if o is not self]
+            others = [r for r in others if not r.colliderect(rect)]
+        box_hits_wall = level.box_hits_wall
+        crowded = False
+        if step_x and not box_hits_wall(x + step_x, y, W, W):
+            if others and rect.move(step_x, 0).collidelist(others) >= 0:
+                crowded = True
+            else:
+                x += step_x
+        if step_y and not box_hits_wall(x, y + step_y, W, W):
+            if others and rect.move(x - rect.x, step_y).collidelist(others) >= 0:
+                crowded = True
+            else:
+                y += step_y
+        s.x[i], s.y[i] = x, y
+
+        # Arrived, or a monster is in the way: plan again from the tile it is on (two
+        # monsters committed to the same tile would otherwise block each other for good)
+        if crowded or (abs(x + W//2 - target_cx) <= 1 and abs(y + W//2 - target_cy) <= 1):
+            s.nx[i] = s.ny[i] = NO_TILE
+
+    def _draw_fallback(self, screen, bounds):
+        pygame.draw.rect(screen, self.fallback_color, bounds, border_radius=4)
@@ -0,0 +1,183 @@
+"""
+Struct-of-arrays actor storage.
+
+An ActorStore keeps one row per actor in parallel columns: positions,
+previous positions (for interpolation), speed, the committed next tile (the
+path cursor) and the player's moved flag in typed `array`s, plus object
+columns for per-actor planner state. Player and Enemy are __slots__ views
+holding only (store, row), so a thousand monsters are a few flat buffers
+rather than a thousand dicts and Rects.
+
+respawn() re-initialises rows in place and hands back the same view objects,
+so a soft reset allocates nothing once the store has reached its peak size.
+"""
+from array import array
+import pygame
+from assets import load_image
+
+NO_TILE = -1        # nx/ny of an actor without a committed next tile
+
+class ActorStore:
+    def __init__(self, view_cls, hitbox: int, tile: int = 0):
+        self.view_cls = view_cls
+        self.hitbox = hitbox            # every actor here has a hitbox x hitbox collision box
+        self.tile = tile                # tile size in pixels (path cursors are tile coordinates)
+        self.x, self.y = array("i"), array("i")
+        self.px, self.py = array("i"), array("i")
+        self.speed = array("d")
+        self.nx, self.ny = array("i"), array("i")
+        self.moved = array("b")
+        self.log_pos = array("i")       # Level.terrain_pos seen so far (incremental planner)
+        self.planner = []               # planner name per row
+        self.incr = []                  # IncrementalPlanner or None per row
+        self.tile_state = []            # Rules.track() bookkeeping per row
+        self.views = []                 # one view per row, created once and reused
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, n):
+        extra = n - len(self.views)
+        if extra <= 0:
+            return
+        zeros = array("i", bytes(4 * extra))
+        for col in (self.x, self.y, self.px, self.py, self.nx, self.ny, self.log_pos):
+            col.extend(zeros)
+        self.speed.extend(array("d", bytes(8 * extra)))
+        self.moved.extend(array("b", bytes(extra)))
+        self.planner.extend([None] * extra)
+        self.incr.extend([None] * extra)
+        self.tile_state.extend([None] * extra)
+        view = self.view_cls._view
+        self.views.extend(view(self, i) for i in range(len(self.views), n))
+
+    def init_row(self, i, x, y, speed, planner=None):
+        self.x[i] = self.px[i] = x
+        self.y[i] = self.py[i] = y
+        self.speed[i] = speed
+        self.nx[i] = self.ny[i] = NO_TILE
+        self.moved[i] = 0
+        self.log_pos[i] = 0
+        self.planner[i] = planner
+        self.incr[i] = None
+        self.tile_state[i] = None
+
+    def respawn(self, starts, speed, planner=None):
+        """Rows 0..len(starts)-1 reset in place to starts [(x, y), ...]; returns their views."""
+        n = len(starts)
+        self._grow(n)
+        for i, (x, y) in enumerate(starts):
+            self.init_row(i, x, y, speed, planner)
+        for i in range(n, self.count):      # rows past the new count drop their planner objects
+            self.incr[i] = self.tile_state[i] = None
+        self.count = n
+        return self.views[:n]
+
+    def oldest_log_pos(self, default: int) -> int:
+        """Lowest log_pos among rows with an incremental planner, else default."""
+        incr, pos = self.incr, self.log_pos
+        return min((pos[i] for i in range(self.count) if incr[i] is not None), default=default)
+
+    def set_speed(self, speed):
+        n = self.count
+        self.speed[:n] = array("d", [speed]) * n
+
+    def nbytes(self) -> int:
+        cols = (self.x, self.y, self.px, self.py, self.speed, self.nx, self.ny, self.moved, self.log_pos)
+        return sum(c.itemsize * len(c) for c in cols)
+
+
+class ActorView:
+    """Row `_i` of store `_s`; subclasses add behaviour and set SPRITE / fallback_color."""
+    __slots__ = ("_s", "_i")
+    SPRITE = None                   # (asset, size)
+    _sprite = False                 # per class: loaded sprite (False = not loaded yet)
+
+    @classmethod
+    def _view(cls, store, i):
+        v = cls.__new__(cls)
+        v._s, v._i = store, i
+        return v
+
+    @property
+    def sprite(self):
+        cls = type(self)
+        if cls._sprite is False:
+            cls._sprite = load_image(*cls.SPRITE)
+        return cls._sprite
+
+    @property
+    def rect(self) -> pygame.Rect:
+        """Collision box (a fresh Rect: move the actor through pos, not through this)."""
+        s, i = self._s, self._i
+        return pygame.Rect(s.x[i], s.y[i], s.hitbox, s.hitbox)
+
+    @property
+    def pos(self):
+        return self._s.x[self._i], self._s.y[self._i]
+
+    @pos.setter
+    def pos(self, xy):
+        self._s.x[self._i], self._s.y[self._i] = xy
+
+    @property
+    def prev_pos(self):
+        """Position before the last update; drawing interpolates from here."""
+        return self._s.px[self._i], self._s.py[self._i]
+
+    @prev_pos.setter
+    def prev_pos(self, xy):
+        self._s.px[self._i], self._s.py[self._i] = xy
+
+    @property
+    def speed(self):
+        return self._s.speed[self._i]
+
+    @speed.setter
+    def speed(self, v):
+        self._s.speed[self._i] = v
+
+    @property
+    def tile_state(self):
+        return self._s.tile_state[self._i]
+
+    @tile_state.setter
+    def tile_state(self, v):
+        self._s.tile_state[self._i] = v
+
+    # ---- Drawing ----
+    def _draw_box(self, alpha):
+        """Hitbox at alpha (0..1) of the way from prev_pos to the current position."""
+        s, i = self._s, self._i
+        x, y = s.x[i], s.y[i]
+        if alpha < 1.0:
+            px, py = s.px[i], s.py[i]
+            x, y = round(px + (x - px) * alpha), round(py + (y - py) * alpha)
+        return pygame.Rect(x, y, s.hitbox, s.hitbox)
+
+    def draw_bounds(self, alpha: float = 1.0) -> pygame.Rect:
+        """World area that draw(alpha=alpha) paints."""
+        box = self._draw_box(alpha)
+        sprite = self.sprite
+        if sprite:
+            # Sprite centred on the (smaller) hitbox
+            r = pygame.Rect((0, 0), sprite.get_size())
+            r.center = box.center
+            return r
+        return box
+
+    def _draw_fallback(self, screen, bounds):
+        pygame.draw.rect(screen, self.fallback_color, bounds)
+
+    def draw(self, screen, camera=None, alpha: float = 1.0) -> None:
+        """Draw in world space (interpolated by alpha), shifted by camera.offset;
+        skipped when out of view."""
+        bounds = self.draw_bounds(alpha)
+        if camera:
+            if not camera.visible(bounds): return
+            bounds = camera.to_screen(bounds)
+        if self.sprite:
+            screen.blit(self.sprite, bounds)
+        else:
+            self._draw_fallback(screen, bounds)
@@ -1,26 +1,45 @@
-import os
+import itertools
+import weakref
 import pygame
-import random
+from collections import OrderedDict
+import levelgen
+from tilegrid import TileGrid
+from pathfinding import distance_field
+from assets import load_image
+from atlas import shared as shared_atlas
+from player import SPRITE as PLAYER_SPRITE
+from enemy import SPRITE as MONSTER_SPRITE
 
 LEMON_PAD_VISUAL = 2
 LEMON_PAD_COLLISION = 2
 
-def _load_sprite(name: str, size):
-    base = os.path.dirname(os.path.abspath(__file__))
-    assets = os.path.join(base, "assets")
-    if not os.path.isdir(assets):
-        return None
-    for fname in os.listdir(assets):
-        root, ext = os.path.splitext(fname)
-        if root.lower() == name.lower() and ext.lower() in (".png",".jpg",".jpeg",".webp",".bmp"):
-            path = os.path.join(assets, fname)
-            try:
-                img = pygame.image.load(path)
-                img = img.convert_alpha() if img.get_alpha() else img.convert()
-                return pygame.transform.smoothscale(img, size)
-            except Exception:
-                return None
-    return None
+CHUNK_TILES = 16        # pre-rendered blocks of CHUNK_TILES x CHUNK_TILES tiles
+MAX_CHUNKS  = 48        # rendered blocks kept; least recently visible evicted first
+
+def texture_specs(tile: int):
+    """(asset, size) of the textures a Level with this tile size loads, for assets.preload."""
+    pad = tile - 2*LEMON_PAD_VISUAL
+    return [("tile_floor", (tile, tile)), ("tile_wall", (tile, tile)),
+            ("tile_lava_0", (tile, tile)), ("tile_lava_1", (tile, tile)),
+            ("item_lemon", (pad, pad))]
+
+# Grid versions are unique across every Level, so results keyed by version
+# (FieldPlanner, Rules.track) can never be taken for another level's
+_grid_versions = itertools.count()
+
+# texture -> opaque copy over black; an entry goes when its texture does (evicted
+# from the assets LRU and no longer used by any Level)
+_flattened = weakref.WeakKeyDictionary()
+
+def _over_black(tex):
+    """tex composited onto black (cached per texture object), or None."""
+    if tex is None or not tex.get_flags() & pygame.SRCALPHA:
+        return tex
+    flat = _flattened.get(tex)
+    if flat is None:
+        flat = _flattened[tex] = pygame.Surface(tex.get_size())
+        flat.blit(tex, (0, 0))
+    return flat
 
 class Level:
     """
@@ -28,39 +47,24 @@ class Level:
       0=floor, 1=wall, 2=lemon, 3=lava, 4=finish(green)
     """
 
-    def __init__(self, tile_size=32, seed=None):
+    def __init__(self, tile_size=32, seed=None, map_data=None, cols=levelgen.COLS, rows=levelgen.ROWS,
+                 lava=levelgen.LAVA_DENSITY, lemons=levelgen.LEMON_DENSITY):
+        """Layout from map_data (a TileGrid, e.g. TileGrid.load(path), or rows of ints) if
+        given, else a winnable cols x rows one generated from seed (a fresh random seed
+        when None) with the given lava / lemon densities. The global random module is
+        left alone."""
         self.TILE = tile_size
-        self.cols, self.rows = 20, 15
-        if seed is not None: random.seed(seed)
-
-        self.start_tile  = (2, 2)
-        self.finish_tile = (self.cols - 2, 2)
-
-        # Base map: walls around
-        self.map_data = [[1]*self.cols]
-        for _ in range(self.rows - 2):
-            self.map_data.append([1] + [0]*(self.cols - 2) + [1])
-        self.map_data.append([1]*self.cols)
-
-        # Scatter
-        for y in range(1, self.rows - 1):
-            for x in range(1, self.cols - 1):
-                if (x, y) in (self.start_tile, self.finish_tile): continue
-                r = random.random()
-                if r < 0.08:   self.map_data[y][x] = 3  # lava
-                elif r < 0.13: self.map_data[y][x] = 2  # lemon
-
-        # Finish and safety rings
-        sx, sy = self.start_tile
-        fx, fy = self.finish_tile
-        self.map_data[fy][fx] = 4
-        for (cx, cy) in [(sx, sy), (fx, fy)]:
-            for dy in (-1,0,1):
-                for dx in (-1,0,1):
-                    tx, ty = cx+dx, cy+dy
-                    if 0 <= ty < self.rows and 0 <= tx < self.cols:
-                        if self.map_data[ty][tx] == 3:
-                            self.map_data[ty][tx] = 0
+        if map_data is None:
+            if seed is None: seed = levelgen.new_seed()
+            map_data = levelgen.generate_valid(seed, cols, rows, lava, lemons)
+        self.seed = seed
+        if not isinstance(map_data, TileGrid):
+            map_data = TileGrid.from_rows(map_data)
+        self.map_data = map_data        # one byte per tile; map_data[y][x] still works
+        self.rows, self.cols = map_data.rows, map_data.cols
+
+        self.start_tile  = levelgen.START_TILE
+        self.finish_tile = levelgen.finish_tile(self.cols)
 
         self.start_x = self.TILE * self.start_tile[0]
         self.start_y = self.TILE * self.start_tile[1]
@@ -70,97 +74,277 @@ class Level:
         }
 
         ts = (self.TILE, self.TILE)
-        self.tex_floor  = _load_sprite("tile_floor", ts)
-        self.tex_wall   = _load_sprite("tile_wall", ts)
+        self.tex_floor  = load_image("tile_floor", ts)
+        self.tex_wall   = load_image("tile_wall", ts)
 
         # Lava: try two frames first, else fallback to single
-        self.tex_lava0  = _load_sprite("tile_lava_0", ts)
-        self.tex_lava1  = _load_sprite("tile_lava_1", ts)
+        self.tex_lava0  = load_image("tile_lava_0", ts)
+        self.tex_lava1  = load_image("tile_lava_1", ts)
         if not (self.tex_lava0 and self.tex_lava1):
-            self.tex_lava0 = self.tex_lava0 or _load_sprite("tile_lava", ts)
+            self.tex_lava0 = self.tex_lava0 or load_image("tile_lava", ts)
             self.tex_lava1 = self.tex_lava1 or self.tex_lava0
 
         self.tex_finish = None
         lemon_size = (self.TILE-2*LEMON_PAD_VISUAL, self.TILE-2*LEMON_PAD_VISUAL)
-        self.tex_lemon  = _load_sprite("item_lemon", lemon_size)
+        self.tex_lemon  = load_image("item_lemon", lemon_size)
+
+        # Every tile and actor sprite packed into shared sheets (one atlas per tile
+        # size); chunks and actors are drawn with batched blits from it. Lava is always
+        # drawn over black, so its frames go in pre-flattened and copy without blending.
+        self.atlas = shared_atlas({
+            "floor": self.tex_floor, "wall": self.tex_wall, "lava0": _over_black(self.tex_lava0),
+            "lava1": _over_black(self.tex_lava1), "lemon": self.tex_lemon,
+            PLAYER_SPRITE[0]: load_image(*PLAYER_SPRITE), MONSTER_SPRITE[0]: load_image(*MONSTER_SPRITE),
+        })
+        # Per lava frame: tile code -> atlas key (None: no texture, fill with self.colors)
+        self._tile_keys = [{0: "floor", 1: "wall", 2: "floor", 3: lava, 4: None} for lava in ("lava0", "lava1")]
+        for keys in self._tile_keys:
+            for code, key in keys.items():
+                if key not in self.atlas: keys[code] = None
+
+        # Flat per-tile wall bitmap (index y*cols + x) for O(1) collision tests
+        self.wall_mask = self.map_data.mask(1)
+
+        # Terrain edits give a new grid_version and are logged so planners can repair;
+        # positions in the log are absolute, entries every planner has seen are trimmed
+        self.grid_version = next(_grid_versions)
+        self.terrain_log = []
+        self.terrain_log_start = 0      # absolute position of terrain_log[0]
+
+        # Shared distance-to-player field used by every Enemy; with a FieldPlanner
+        # it is computed off the main thread and the last one is followed meanwhile
+        self._field = None
+        self._field_goal = None
+        self.field_planner = None
+
+        # Lemons still on the map, one byte per tile (lemon tiles never change)
+        self.item_mask = self.map_data.mask(2)
+        self.items_left = self.item_mask.count(1)
+
+        # Render cache: chunks are rendered when first seen, then only their
+        # lava/lemon cells are repainted; the map is never rendered whole
+        self._chunks = OrderedDict()    # (cx, cy) -> [surface, lava_frame]
+        self._chunk_lava = {}           # (cx, cy) -> lava cells in that chunk
+        self._picked_cells = []
+        self.dirty = []          # world-pixel rects repainted since take_dirty()
+
+    # ---- Rendering ----
+    def _paint_tiles(self, surf, cells, lava_frame=0, origin=(0, 0)):
+        """Paint (x, y, tile) cells: textured ones in one blits() call, the rest as colour rects."""
+        T, (ox, oy) = self.TILE, origin
+        keys, batch = self._tile_keys[lava_frame], []
+        for x, y, tile in cells:
+            key = keys.get(tile, "floor")
+            if key:
+                batch.append((key, (x*T - ox, y*T - oy)))
+            else:
+                pygame.draw.rect(surf, self.colors.get(tile, self.colors[0]), (x*T - ox, y*T - oy, T, T))
+        self.atlas.blits(surf, batch)
+
+    def _paint_lemons(self, surf, cells, origin=(0, 0)):
+        P, T = LEMON_PAD_VISUAL, self.TILE
+        dests = [(x*T + P - origin[0], y*T + P - origin[1]) for x, y in cells]
+        if "lemon" in self.atlas:
+            self.atlas.blits(surf, [("lemon", d) for d in dests])
+        else:
+            for d in dests:
+                pygame.draw.rect(surf, self.colors[2], (d[0], d[1], T - 2*P, T - 2*P))
+
+    def _chunk_bounds(self, key):
+        """Tile range [x0, x1) x [y0, y1) of chunk key."""
+        cx, cy = key
+        x0, y0 = cx*CHUNK_TILES, cy*CHUNK_TILES
+        return x0, y0, min(x0 + CHUNK_TILES, self.cols), min(y0 + CHUNK_TILES, self.rows)
+
+    def _chunk_rect(self, key):
+        x0, y0, x1, y1 = self._chunk_bounds(key)
+        T = self.TILE
+        return pygame.Rect(x0*T, y0*T, (x1-x0)*T, (y1-y0)*T)
+
+    def _lava_in(self, key):
+        cells = self._chunk_lava.get(key)
+        if cells is None:
+            x0, y0, x1, y1 = self._chunk_bounds(key)
+            data, cols = self.map_data.data, self.cols
+            cells = self._chunk_lava[key] = [(x, y) for y in range(y0, y1)
+                                             for x in range(x0, x1) if data[y*cols + x] == 3]
+        return cells
 
-        self.initial_items = self._extract_items()
-        self.items = list(self.initial_items)
+    def _build_chunk(self, key, lava_frame):
+        """Tiles (lava for lava_frame) with lemons on top."""
+        x0, y0, x1, y1 = self._chunk_bounds(key)
+        origin = (x0*self.TILE, y0*self.TILE)
+        surf = pygame.Surface(((x1-x0)*self.TILE, (y1-y0)*self.TILE))
+        data, items, cols = self.map_data.data, self.item_mask, self.cols
+        self._paint_tiles(surf, [(x, y, data[y*cols + x]) for y in range(y0, y1) for x in range(x0, x1)],
+                          lava_frame, origin)
+        self._paint_lemons(surf, [(x, y) for y in range(y0, y1) for x in range(x0, x1) if items[y*cols + x]],
+                           origin)
+        return surf
 
-    def draw(self, screen):
+    def _repaint_lava(self, key, surf, lava_frame):
+        """Lava flips only every ~180 ms."""
+        origin = self._chunk_rect(key).topleft
+        T, cells = self.TILE, self._lava_in(key)
+        self.dirty.extend(pygame.Rect(x*T, y*T, T, T) for x, y in cells)
+        self._paint_tiles(surf, [(x, y, 3) for x, y in cells], lava_frame, origin)
+
+    def draw(self, screen, camera=None):
+        """Blit the chunks overlapping the view (camera.rect, else the map's top-left)."""
         t = pygame.time.get_ticks()
         lava_frame = 0 if ((t // 180) % 2 == 0) else 1  # ~5.5 fps flicker
+        view = camera.rect if camera else screen.get_rect()
+        T, C = self.TILE, CHUNK_TILES * self.TILE
 
-        for y, row in enumerate(self.map_data):
-            for x, tile in enumerate(row):
-                dst = pygame.Rect(x*self.TILE, y*self.TILE, self.TILE, self.TILE)
-
-                if tile == 1:
-                    tex, color = self.tex_wall, self.colors[1]
-                elif tile == 3:
-                    tex = self.tex_lava0 if lava_frame == 0 else self.tex_lava1
-                    color = self.colors[3]
-                elif tile == 4:
-                    tex, color = self.tex_finish, self.colors[4]
-                else:
-                    tex, color = self.tex_floor, self.colors[0]
+        # Picked lemons: repaint the bare tile where the chunk is resident
+        for (x, y) in self._picked_cells:
+            entry = self._chunks.get((x // CHUNK_TILES, y // CHUNK_TILES))
+            if entry:
+                origin = self._chunk_rect((x // CHUNK_TILES, y // CHUNK_TILES)).topleft
+                self._paint_tiles(entry[0], [(x, y, self.map_data[y][x])], entry[1], origin)
+                self.dirty.append(pygame.Rect(x*T, y*T, T, T))
+        self._picked_cells.clear()
 
-                if tex is not None:
-                    screen.blit(tex, dst)
+        for cy in range(max(view.top // C, 0), min((view.bottom - 1) // C, (self.rows - 1) // CHUNK_TILES) + 1):
+            for cx in range(max(view.left // C, 0), min((view.right - 1) // C, (self.cols - 1) // CHUNK_TILES) + 1):
+                key = (cx, cy)
+                entry = self._chunks.get(key)
+                if entry is None:
+                    entry = self._chunks[key] = [self._build_chunk(key, lava_frame), lava_frame]
+                    self.dirty.append(self._chunk_rect(key))
                 else:
-                    pygame.draw.rect(screen, color, dst)
+                    self._chunks.move_to_end(key)
+                    if entry[1] != lava_frame:
+                        self._repaint_lava(key, entry[0], lava_frame)
+                        entry[1] = lava_frame
+                screen.blit(entry[0], (cx*C - view.x, cy*C - view.y))
+        while len(self._chunks) > MAX_CHUNKS:
+            self._chunks.popitem(last=False)
 
-        # lemons
-        for (ix, iy) in self.items:
-            if self.tex_lemon is not None:
-                pos = (ix*self.TILE + LEMON_PAD_VISUAL, iy*self.TILE + LEMON_PAD_VISUAL)
-                screen.blit(self.tex_lemon, pos)
-            else:
-                rect = pygame.Rect(ix*self.TILE+LEMON_PAD_VISUAL, iy*self.TILE+LEMON_PAD_VISUAL,
-                                   self.TILE-2*LEMON_PAD_VISUAL, self.TILE-2*LEMON_PAD_VISUAL)
-                pygame.draw.rect(screen, self.colors[2], rect)
-
-    def collides_with_wall(self, rect: pygame.Rect) -> bool:
-        for y, row in enumerate(self.map_data):
-            for x, tile in enumerate(row):
-                if tile == 1:
-                    if rect.colliderect(pygame.Rect(x*self.TILE, y*self.TILE, self.TILE, self.TILE)):
-                        return True
-        return False
+    def draw_actors(self, screen, actors, camera=None, alpha: float = 1.0):
+        """Draw actors (in list order) like actor.draw(), but as one blits() call from the atlas.
+        Actors without an atlas sprite fall back to their own draw()."""
+        view = camera.rect if camera else None
+        ox, oy = view.topleft if view else (0, 0)
+        batch = []
+        for a in actors:
+            if a.sprite is None or a.sprite_key not in self.atlas:
+                self.atlas.blits(screen, batch)
+                batch = []
+                a.draw(screen, camera, alpha)
+                continue
+            bounds = a.draw_bounds(alpha)
+            if view and not view.colliderect(bounds):
+                continue
+            batch.append((a.sprite_key, (bounds.x - ox, bounds.y - oy)))
+        self.atlas.blits(screen, batch)
 
-    def _extract_items(self):
-        return [(x, y) for y, row in enumerate(self.map_data) for x, t in enumerate(row) if t == 2]
+    def take_dirty(self):
+        """World-pixel rects repainted since the last call (for dirty-rect presentation)."""
+        rects, self.dirty = self.dirty, []
+        return rects
 
-    def reset_run_state(self):
-        self.items = list(self.initial_items)
-
-    def check_pickup(self, rect: pygame.Rect) -> bool:
-        hit = None
-        for (ix, iy) in self.items:
-            item_rect = pygame.Rect(ix*self.TILE+LEMON_PAD_COLLISION,
-                                    iy*self.TILE+LEMON_PAD_COLLISION,
-                                    self.TILE-2*LEMON_PAD_COLLISION,
-                                    self.TILE-2*LEMON_PAD_COLLISION)
-            if rect.colliderect(item_rect):
-                hit = (ix, iy); break
-        if hit:
-            self.items.remove(hit); return True
-        return False
+    # ---- Terrain queries ----
+    def tile_range(self, left, top, right, bottom):
+        """Inclusive tile bounds (x0, y0, x1, y1) overlapped by a pixel box, clamped to the map.
+        Empty (x0 > x1 or y0 > y1) when the box is degenerate or off the map."""
+        T = self.TILE
+        x0 = max(left // T, 0)
+        y0 = max(top // T, 0)
+        x1 = min((right - 1) // T, self.cols - 1)
+        y1 = min((bottom - 1) // T, self.rows - 1)
+        return x0, y0, x1, y1
 
-    def tile_at_pixel_center(self, rect: pygame.Rect) -> int:
-        cx = rect.centerx // self.TILE
-        cy = rect.centery // self.TILE
-        if 0 <= cy < self.rows and 0 <= cx < self.cols:
-            return self.map_data[cy][cx]
-        return 1
-
-    def is_on_red(self, rect: pygame.Rect) -> bool:
-        return self.tile_at_pixel_center(rect) == 3
-
-    def touches_exit(self, rect: pygame.Rect) -> bool:
-        for y, row in enumerate(self.map_data):
-            for x, tile in enumerate(row):
-                if tile == 4:
-                    if rect.colliderect(pygame.Rect(x*self.TILE, y*self.TILE, self.TILE, self.TILE)):
-                        return True
+    def box_hits_wall(self, x: int, y: int, w: int, h: int) -> bool:
+        """The box (x, y, w, h) overlaps a wall tile (only the tiles under it are looked at)."""
+        if w <= 0 or h <= 0:
+            return False
+        x0, y0, x1, y1 = self.tile_range(x, y, x + w, y + h)
+        cols, walls = self.cols, self.wall_mask
+        for ty in range(y0, y1 + 1):
+            row = ty * cols
+            for tx in range(x0, x1 + 1):
+                if walls[row + tx]:
+                    return True
         return False
+
+    def reset_run_state(self):
+        self.item_mask = self.map_data.mask(2)
+        self.items_left = self.item_mask.count(1)
+        self._chunks.clear()    # lemons come back; re-render on next draw
+
+    def lemon_box_hit(self, rect: pygame.Rect, x: int, y: int) -> bool:
+        """rect overlaps the (padded) pickup box of tile (x, y)."""
+        T, P = self.TILE, LEMON_PAD_COLLISION
+        return rect.colliderect((x*T+P, y*T+P, T-2*P, T-2*P))
+
+    def take_item(self, x: int, y: int) -> None:
+        self.item_mask[y*self.cols + x] = 0
+        self.items_left -= 1
+        self._picked_cells.append((x, y))
+
+    def set_tile(self, x: int, y: int, tile: int) -> None:
+        """Change terrain at runtime (walls/lava/finish); keeps every index in sync."""
+        i = y*self.cols + x
+        if self.map_data.data[i] == tile: return
+        self.map_data.data[i] = tile
+        self.wall_mask[i] = tile == 1
+        key = (x // CHUNK_TILES, y // CHUNK_TILES)
+        self._chunks.pop(key, None)
+        self._chunk_lava.pop(key, None)
+        self._field_goal = None
+        self.grid_version = next(_grid_versions)
+        self.terrain_log.append((x, y))
+
+    @property
+    def terrain_pos(self) -> int:
+        """Absolute log position just past the newest terrain edit."""
+        return self.terrain_log_start + len(self.terrain_log)
+
+    def terrain_changes(self, pos: int):
+        """Tiles edited since absolute log position pos (oldest first)."""
+        return self.terrain_log[max(pos - self.terrain_log_start, 0):]
+
+    def trim_terrain_log(self, pos: int) -> None:
+        """Forget edits before absolute position pos (no reader still needs them)."""
+        n = min(pos - self.terrain_log_start, len(self.terrain_log))
+        if n > 0:
+            del self.terrain_log[:n]
+            self.terrain_log_start += n
+
+    # ---- Pathfinding ----
+    def distance_field(self, goal_t):
+        """Steps from every tile to goal_t (-1 = unreachable), walking around walls.
+        One BFS per goal tile; all enemies share the cached result."""
+        if goal_t == self._field_goal:
+            return self._field
+        self._field = distance_field(self.cols, self.rows, self.wall_mask, goal_t)
+        self._field_goal = goal_t
+        return self._field
+
+    def _planned_field(self, goal_t):
+        """distance_field() via self.field_planner: asks for goal_t and meanwhile keeps
+        returning the newest field that has arrived (None before the first)."""
+        if goal_t == self._field_goal:
+            return self._field
+        planner = self.field_planner
+        planner.request(self.grid_version, goal_t, self.wall_mask, self.cols, self.rows)
+        res = planner.poll(self.grid_version)
+        if res:
+            self._field_goal, self._field = res
+        return self._field
+
+    def next_step(self, from_t, goal_t):
+        """Neighbour of from_t one step closer to goal_t, or None (there already / unreachable)."""
+        field = self._planned_field(goal_t) if self.field_planner else self.distance_field(goal_t)
+        cols, rows = self.cols, self.rows
+        x, y = from_t
+        if field is None or not (0 <= x < cols and 0 <= y < rows):
+            return None
+        d = field[y*cols + x]
+        if d <= 0:
+            return None
+        for nx, ny in ((x+1,y),(x-1,y),(x,y+1),(x,y-1)):
+            if 0 <= nx < cols and 0 <= ny < rows and field[ny*cols + nx] == d - 1:
+                return nx, ny
+        return None
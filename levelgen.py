@@ -0,0 +1,126 @@
+"""
+Level layouts: generation with a private RNG, reachability validation and a
+pre-generated pool so a new run never waits for (or receives) a bad map.
+
+Kept free of pygame so pool workers stay light.
+"""
+import random
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+COLS, ROWS = 20, 15
+LAVA_DENSITY  = 0.08
+LEMON_DENSITY = 0.05            # on top of lava: r < 0.13 gives a lemon
+MAX_ATTEMPTS  = 100
+
+START_TILE = (2, 2)
+def finish_tile(cols=COLS): return (cols - 2, 2)
+
+def generate(seed, cols=COLS, rows=ROWS, lava=LAVA_DENSITY, lemons=LEMON_DENSITY):
+    """Raw layout for seed (may be unwinnable). Tiles: 0 floor, 1 wall, 2 lemon, 3 lava, 4 finish."""
+    rng = random.Random(seed)
+    start, finish = START_TILE, finish_tile(cols)
+
+    # Base map: walls around
+    map_data = [[1]*cols]
+    for _ in range(rows - 2):
+        map_data.append([1] + [0]*(cols - 2) + [1])
+    map_data.append([1]*cols)
+
+    # Scatter
+    for y in range(1, rows - 1):
+        for x in range(1, cols - 1):
+            if (x, y) in (start, finish): continue
+            r = rng.random()
+            if r < lava:            map_data[y][x] = 3
+            elif r < lava + lemons: map_data[y][x] = 2
+
+    # Finish and safety rings
+    fx, fy = finish
+    map_data[fy][fx] = 4
+    for (cx, cy) in (start, finish):
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                tx, ty = cx + dx, cy + dy
+                if 0 <= ty < rows and 0 <= tx < cols and map_data[ty][tx] == 3:
+                    map_data[ty][tx] = 0
+    return map_data
+
+def is_winnable(map_data, start, finish):
+    """Finish and every lemon reachable from start over floor/lemon/finish tiles (no lava)."""
+    rows, cols = len(map_data), len(map_data[0])
+    seen = {start}
+    q = deque([start])
+    while q:
+        x, y = q.popleft()
+        for nx, ny in ((x+1, y), (x-1, y), (x, y+1), (x, y-1)):
+            if 0 <= nx < cols and 0 <= ny < rows and (nx, ny) not in seen \
+                    and map_data[ny][nx] in (0, 2, 4):
+                seen.add((nx, ny))
+                q.append((nx, ny))
+    if finish not in seen:
+        return False
+    return all((x, y) in seen for y, row in enumerate(map_data)
+               for x, t in enumerate(row) if t == 2)
+
+def generate_valid(seed, cols=COLS, rows=ROWS, lava=LAVA_DENSITY, lemons=LEMON_DENSITY):
+    """Winnable layout for seed; rejected layouts retry with derived seeds (deterministic)."""
+    start, finish = START_TILE, finish_tile(cols)
+    for attempt in range(MAX_ATTEMPTS):
+        map_data = generate(f"{seed}:{attempt}" if attempt else seed, cols, rows, lava, lemons)
+        if is_winnable(map_data, start, finish):
+            return map_data
+    raise RuntimeError(f"no winnable layout for seed {seed!r} after {MAX_ATTEMPTS} attempts")
+
+def new_seed() -> int:
+    return random.SystemRandom().randrange(2**31)
+
+def _job(seed, cols, rows, lava, lemons):
+    return seed, generate_valid(seed, cols, rows, lava, lemons)
+
+
+class LevelPool:
+    """
+    Keeps `size` validated layouts in flight on worker processes (one by
+    default: a layout takes a few ms, so more workers only cost startup forks
+    and memory).
+
+    take() hands out a finished (seed, map_data) and queues a replacement. If
+    nothing has finished yet it generates one in-process (a few ms) instead of
+    waiting on the pool.
+    """
+
+    def __init__(self, size=4, workers=1, cols=COLS, rows=ROWS,
+                 lava=LAVA_DENSITY, lemons=LEMON_DENSITY):
+        self.size = size
+        self.params = (cols, rows, lava, lemons)
+        self._executor = self._make_executor(min(workers or size, size))
+        self._pending = deque(self._submit() for _ in range(size))
+
+    @staticmethod
+    def _make_executor(workers):
+        # Without fork, workers would re-import main.py (and open a window); use threads.
+        if "fork" in multiprocessing.get_all_start_methods():
+            return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+        return ThreadPoolExecutor(workers)
+
+    def _submit(self):
+        return self._executor.submit(_job, new_seed(), *self.params)
+
+    def take(self):
+        """(seed, map_data) of a winnable layout; never blocks on the workers."""
+        for fut in list(self._pending):
+            if fut.done():
+                self._pending.remove(fut)
+                self._pending.append(self._submit())
+                try:
+                    return fut.result()
+                except Exception:
+                    break                   # broken worker: fall back below
+        return _job(new_seed(), *self.params)
+
+    def close(self):
+        for fut in self._pending:
+            fut.cancel()
+        self._executor.shutdown(wait=True, cancel_futures=True)
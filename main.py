@@ -1,28 +1,66 @@
 import os
-import json
 import time
 import random
 import pygame
-from player import Player
-from rules import Rules
-from level import Level
-from enemy import Enemy
+import assets
+import textcache
+from textcache import Composite
+from render import SurfacePool, DirtyRects
+import levelgen
+from levelgen import LevelPool
+from camera import Camera
+from level import texture_specs
+from player import SPRITE as PLAYER_SPRITE
+from enemy import SPRITE as MONSTER_SPRITE
+from scores import ScoreStore
+from session import GameSession, MAX_LIVES, PLAYING, WON, TILE, keys_mask
+from replay import ReplayWriter
+from profiler import FrameProfiler
+from pathfinding import FieldPlanner
 
 # ---------------- Config ----------------
 WIDTH, HEIGHT = 640, 480
-TILE = 32
-PLAYER_SPEED = 2
-ENEMY_SPEED  = 2            # base speed; will ramp up with score
-IDLE_LIMIT_FRAMES = 120
-MAX_LIVES = 3
+MAP_COLS, MAP_ROWS = levelgen.COLS, levelgen.ROWS   # larger maps scroll with the player
 
-SCORES_FILE = "scores.json"
+SCORES_FILE = "scores.log"      # append-only; an old scores.json is imported once
 MAX_SCORES = 5
 
-# Effect timings
-FLASH_MAX_FRAMES  = 14      # red flash duration
-SHAKE_MAX_FRAMES  = 12      # screen shake duration
-SHAKE_MAX_AMPL    = 4       # max px of shake at start
+# Stress mode: > 0 spawns this many monsters (kept apart by separation) instead of the pair
+STRESS_ENEMIES = 0
+
+# Every run is recorded (seed + per-tick arrow keys); play back with `python replay.py FILE`
+RECORD_REPLAYS = True
+REPLAY_DIR = "replays"
+
+# F3 toggles the frame profiler and its overlay, F4 exports CSV + Chrome trace
+PROFILE_DIR = "profiles"
+PROFILER = FrameProfiler(capacity=600)
+
+# Simulation runs at a fixed rate; rendering runs as fast as MAX_FPS allows and
+# interpolates actors between the last two ticks
+TICK_RATE = 60
+TICK_DT   = 1.0 / TICK_RATE
+MAX_CATCHUP_TICKS = 5       # per rendered frame; beyond that the backlog is dropped
+MAX_FPS   = 240             # render cap while playing (0 = uncapped)
+IDLE_FPS  = 30              # menus, name entry, leaderboard and end screens are static
+
+# Effect timings (simulation ticks)
+FLASH_TICKS    = 14         # red flash duration
+SHAKE_TICKS    = 12         # screen shake duration
+SHAKE_MAX_AMPL = 4          # max px of shake at start
+
+# Present only changed screen regions (False: full flip every frame)
+DIRTY_RECTS = True
+
+# Validated layouts are generated ahead of time on a worker process
+# (started before pygame so the forked worker carries no SDL state)
+LEVEL_POOL = LevelPool(cols=MAP_COLS, rows=MAP_ROWS)
+
+# On big maps the monsters' shared BFS (one per player tile) is computed on a
+# worker process and they follow the previous field until it lands; small maps
+# search in well under a millisecond and stay in-line (and replay-exact)
+ASYNC_PATHS_MIN_TILES = 64 * 64
+PATH_PLANNER = FieldPlanner() if MAP_COLS * MAP_ROWS >= ASYNC_PATHS_MIN_TILES else None
 
 # ---------------- Pygame init ----------------
 pygame.init()
@@ -37,6 +75,11 @@ pygame.display.set_caption("Three Forbidden Acts")
 CLOCK = pygame.time.Clock()
 FONT     = pygame.font.Font(None, 28)
 FONT_BIG = pygame.font.Font(None, 40)
+FONT_SMALL = pygame.font.Font(None, 20)
+
+# Offscreen world surface and flash overlay, reused every frame
+SURFACES = SurfacePool()
+DIRTY = DirtyRects((WIDTH, HEIGHT), enabled=DIRTY_RECTS)
 
 # ---------------- UI colors (blue theme) ----------------
 COLOR_UI_DIM     = (90, 140, 220)
@@ -46,62 +89,17 @@ COLOR_WARN       = (255, 120, 120)
 COLOR_PANEL      = (0, 0, 0, 160)
 
 # ---------------- Assets ----------------
-def load_menu_bg(width, height):
-    base = os.path.dirname(os.path.abspath(__file__))
-    assets_dir = os.path.join(base, "assets")
-    exts = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
-    if not os.path.isdir(assets_dir):
-        print(f"[Menu BG] assets not found: {assets_dir}")
-        return None
-    try:
-        files = os.listdir(assets_dir)
-    except Exception as e:
-        print(f"[Menu BG] cannot list assets/: {e}")
-        return None
-    chosen = None
-    for f in files:
-        r, e = os.path.splitext(f)
-        if r.lower() == "menu_bg" and e.lower() in exts:
-            chosen = os.path.join(assets_dir, f)
-            break
-    if not chosen:
-        print(f"[Menu BG] Put menu_bg.(png|jpg|jpeg|webp|bmp) into {assets_dir}")
-        return None
-    try:
-        img = pygame.image.load(chosen)
-        img = img.convert_alpha() if img.get_alpha() else img.convert()
-        return pygame.transform.smoothscale(img, (width, height))
-    except Exception as e:
-        print(f"[Menu BG] failed to load {chosen}: {e}")
-        return None
-
-MENU_BG = load_menu_bg(WIDTH, HEIGHT)
-
-def load_sound(basename: str):
-    """Load assets/sfx_<basename>.(wav|ogg|mp3)."""
-    if not AUDIO_OK:
-        return None
-    base = os.path.dirname(os.path.abspath(__file__))
-    assets = os.path.join(base, "assets")
-    if not os.path.isdir(assets):
-        return None
-    for ext in (".wav", ".ogg", ".mp3"):
-        p = os.path.join(assets, f"sfx_{basename}{ext}")
-        if os.path.exists(p):
-            try:
-                snd = pygame.mixer.Sound(p)
-                snd.set_volume(0.6)
-                print(f"[SFX] Loaded {os.path.basename(p)}")
-                return snd
-            except Exception as e:
-                print(f"[SFX] Failed to load {p}: {e}")
-                return None
-    return None
+# Only the menu background is needed for the first frame; the game textures are
+# decoded (or read back from the disk cache) on a worker thread while the menu runs
+MENU_BG = assets.load_image("menu_bg", (WIDTH, HEIGHT))
+if MENU_BG is None:
+    print(f"[Menu BG] Put menu_bg.(png|jpg|jpeg|webp|bmp) into {assets.ASSETS_DIR}")
+assets.preload(texture_specs(TILE) + [PLAYER_SPRITE, MONSTER_SPRITE])
 
 SFX = {
-    "pickup": load_sound("pickup"),
-    "break":  load_sound("break"),
-    "win":    load_sound("win"),
+    "pickup": assets.load_sound("sfx_pickup"),
+    "break":  assets.load_sound("sfx_break"),
+    "win":    assets.load_sound("sfx_win"),
 }
 def play_sfx(key: str):
     snd = SFX.get(key)
@@ -110,22 +108,8 @@ def play_sfx(key: str):
         except Exception: pass
 
 # ---------------- Scores ----------------
-def load_scores():
-    if not os.path.exists(SCORES_FILE): return []
-    try:
-        with open(SCORES_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, list): return data
-    except Exception: pass
-    return []
-
-def save_score(name: str, score: int):
-    scores = load_scores()
-    scores.append({"name": name[:20], "score": int(score), "ts": int(time.time())})
-    scores.sort(key=lambda s: s["score"], reverse=True)
-    scores = scores[:MAX_SCORES]
-    with open(SCORES_FILE, "w", encoding="utf-8") as f:
-        json.dump(scores, f, ensure_ascii=False, indent=2)
+# Leaderboard lives in memory; writes go to the log on a background thread
+SCORES = ScoreStore(SCORES_FILE)
 
 # ---------------- States ----------------
 STATE_MENU, STATE_NAME, STATE_PLAY, STATE_SCORES, STATE_WIN, STATE_GAMEOVER = (
@@ -137,65 +121,50 @@ menu_index = 0
 menu_items = ["Start Game", "High Scores", "Quit"]
 
 player_name = ""
-idle_frames = 0
-lives = MAX_LIVES
-won = False
 show_help = False
 
-# Two enemies container
-enemies = []
+# Simulation (player, monsters, rules, lives) and the view onto it; created per run
+session = None
+camera = None
+recorder = None
 
 # Effects state
-flash_frames = 0
-shake_frames = 0
-
-# ---------------- Difficulty ----------------
-def current_enemy_speed(score: int) -> float:
-    """Base speed plus +0.2 for every 5 points."""
-    return ENEMY_SPEED + 0.2 * (score // 5)
+flash_ticks = 0
+shake_ticks = 0
+effects_last = False        # shake/flash drawn last frame (needs a full present to clear)
 
-def apply_enemy_speed():
-    spd = current_enemy_speed(rules.score)
-    for e in enemies:
-        e.speed = spd
+# Dirty-rect bookkeeping for the play screen
+actor_bounds = []
+hud_rect = pygame.Rect(0, 0, 0, 0)
 
 # ---------------- World lifecycle ----------------
 def start_new_run():
-    global level, player, rules, enemies, idle_frames, won, lives, flash_frames, shake_frames
-    level = Level(tile_size=TILE, seed=None)
-    rules = Rules()  # score resets on brand-new run
-    player = Player(level.start_x, level.start_y, speed=PLAYER_SPEED)
-    enemies = [
-        Enemy(start_px_x=TILE*15, start_px_y=TILE*3,  tile_size=TILE, speed=current_enemy_speed(0)),
-        Enemy(start_px_x=TILE*4,  start_px_y=TILE*11, tile_size=TILE, speed=current_enemy_speed(0)),
-    ]
-    idle_frames = 0
-    lives = MAX_LIVES
-    won = False
-    flash_frames = 0
-    shake_frames = 0
-
-def reset_after_break():
-    """Lose a heart; soft-reset world if hearts remain, else Game Over."""
-    global enemies, idle_frames, state, lives, flash_frames, shake_frames
-    lives -= 1
-    if lives > 0:
-        rules.reset_run_state()           # keep score
-        level.reset_run_state()
-        player.reset_position(level.start_x, level.start_y)
-        enemies = [
-            Enemy(start_px_x=TILE*15, start_px_y=TILE*3,  tile_size=TILE, speed=current_enemy_speed(rules.score)),
-            Enemy(start_px_x=TILE*4,  start_px_y=TILE*11, tile_size=TILE, speed=current_enemy_speed(rules.score)),
-        ]
-        idle_frames = 0
-    else:
-        save_score(player_name or "Player", rules.score)
-        state = STATE_GAMEOVER
+    global session, camera, recorder, flash_ticks, shake_ticks, sim_time
+    seed, layout = LEVEL_POOL.take()
+    session = GameSession(seed=seed, map_data=layout, field_planner=PATH_PLANNER,
+                          enemy_count=STRESS_ENEMIES, separation=STRESS_ENEMIES > 0)
+    session.profiler = PROFILER
+    if RECORD_REPLAYS:
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        path = os.path.join(REPLAY_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{seed}.tfr")
+        recorder = ReplayWriter(path, seed, session.level.cols, session.level.rows, TILE,
+                                STRESS_ENEMIES, STRESS_ENEMIES > 0)
+    level = session.level
+    camera = Camera(WIDTH, HEIGHT, level.cols*TILE, level.rows*TILE)
+    flash_ticks = 0
+    shake_ticks = 0
+    sim_time = 0.0
+
+def stop_recording():
+    global recorder
+    if recorder:
+        recorder.close()
+        recorder = None
 
 # ---------------- Draw helpers ----------------
 def draw_text_center(surf, text, y, font, color=(240,240,240)):
-    t = font.render(text, True, color)
-    surf.blit(t, (WIDTH//2 - t.get_width()//2, y))
+    t = textcache.render(font, text, color)
+    surf.blit(t, (surf.get_width()//2 - t.get_width()//2, y))
 
 def draw_heart(surf, x, y, size, color):
     r = size // 4
@@ -203,35 +172,37 @@ def draw_heart(surf, x, y, size, color):
     pygame.draw.circle(surf, color, (x + 2*size//3, y + size//3), r)
     pygame.draw.polygon(surf, color, [(x, y + size//3), (x + size, y + size//3), (x + size//2, y + size)])
 
-def draw_hearts():
+def draw_hearts(surf, lives):
     margin, size = 8, 18
     spacing = size + 6
     for i in range(MAX_LIVES):
         x = WIDTH - margin - (MAX_LIVES - i) * spacing
         y = margin
         color = (220, 60, 60) if i < lives else (90, 90, 90)
-        draw_heart(SCREEN, x, y, size, color)
+        draw_heart(surf, x, y, size, color)
 
-def draw_hud():
-    info = f"Score: {rules.score}"
-    text = FONT.render(info, True, COLOR_UI)
+# ---- Cached composites: rebuilt only when their inputs change ----
+def build_hud(score, lives, msg):
+    text = textcache.render(FONT, f"Score: {score}", COLOR_UI)
     pad = 6
-    bg = pygame.Surface((text.get_width()+pad*2, text.get_height()+pad*2), pygame.SRCALPHA)
-    bg.fill(COLOR_PANEL)
-    SCREEN.blit(bg, (8, 8))
-    SCREEN.blit(text, (8+pad, 8+pad))
-    draw_hearts()
-    if rules.last_broken_msg:
-        warn = FONT.render(rules.last_broken_msg, True, COLOR_WARN)
-        SCREEN.blit(warn, (8, 8 + bg.get_height() + 6))
-
-def draw_help_overlay():
-    panel = pygame.Surface((WIDTH-80, HEIGHT-120), pygame.SRCALPHA)
-    panel.fill((0,0,0,200))
+    bg_h = text.get_height() + pad*2
+    warn = textcache.render(FONT, msg, COLOR_WARN) if msg else None
+    surf = pygame.Surface((WIDTH, 8 + bg_h + (6 + warn.get_height() if warn else 0)), pygame.SRCALPHA)
+    surf.fill(COLOR_PANEL, pygame.Rect(8, 8, text.get_width() + pad*2, bg_h))
+    surf.blit(text, (8+pad, 8+pad))
+    draw_hearts(surf, lives)
+    if warn:
+        surf.blit(warn, (8, 8 + bg_h + 6))
+    return surf
+
+def build_help_panel():
+    # Full-screen layer: the text runs past the panel's right and bottom edges
+    surf = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
     x = 40; y = 60
-    SCREEN.blit(panel, (x, y))
+    panel = pygame.Rect(x, y, WIDTH-80, HEIGHT-120)
+    surf.fill((0,0,0,200), panel)
     yy = y + 20
-    draw_text_center(SCREEN, "How to Play — Three Forbidden Acts", yy, FONT_BIG, COLOR_UI_BRIGHT)
+    draw_text_center(surf, "How to Play — Three Forbidden Acts", yy, FONT_BIG, COLOR_UI_BRIGHT)
     yy += 50
     lines = [
         "Goal: Reach the green FINISH tile. Collect lemons for points.",
@@ -247,40 +218,160 @@ def draw_help_overlay():
         "  ESC — Back to menu (in some screens).",
     ]
     for line in lines:
-        t = FONT.render(line, True, COLOR_UI)
-        SCREEN.blit(t, (x + 30, yy)); yy += 28
-    hint = "Press H or F1 to hide"
-    t = FONT.render(hint, True, COLOR_UI_DIM)
-    SCREEN.blit(t, (WIDTH//2 - t.get_width()//2, y + panel.get_height() - 30))
+        surf.blit(textcache.render(FONT, line, COLOR_UI), (x + 30, yy)); yy += 28
+    draw_text_center(surf, "Press H or F1 to hide", y + panel.height - 30, FONT, COLOR_UI_DIM)
+    return surf
+
+def build_menu(index):
+    surf = pygame.Surface((WIDTH, HEIGHT))
+    if MENU_BG:
+        surf.blit(MENU_BG, (0, 0))
+        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0,0,0,120)); surf.blit(overlay, (0,0))
+    else:
+        surf.fill((12,12,12))
+    draw_text_center(surf, "Three Forbidden Acts", 80, FONT_BIG, COLOR_UI_BRIGHT)
+    for i, item in enumerate(menu_items):
+        color = COLOR_UI_BRIGHT if i == index else COLOR_UI_DIM
+        draw_text_center(surf, item, 170 + i*40, FONT, color)
+    return surf
+
+def build_name_entry(name):
+    surf = pygame.Surface((WIDTH, HEIGHT))
+    draw_text_center(surf, "Enter your name", 120, FONT_BIG, COLOR_UI_BRIGHT)
+    box_w = 360
+    box = pygame.Rect(WIDTH//2 - box_w//2, 200, box_w, 40)
+    pygame.draw.rect(surf, (40,40,40), box, border_radius=6)
+    pygame.draw.rect(surf, (120,120,120), box, width=2, border_radius=6)
+    surf.blit(textcache.render(FONT, name or "_", COLOR_UI), (box.x + 10, box.y + 8))
+    draw_text_center(surf, "Press ENTER to start   ·   H / F1 — Help", 260, FONT, COLOR_UI_DIM)
+    return surf
+
+def build_scores(scores):
+    surf = pygame.Surface((WIDTH, HEIGHT))
+    draw_text_center(surf, "High Scores (Top 5)", 80, FONT_BIG, COLOR_UI_BRIGHT)
+    if not scores:
+        draw_text_center(surf, "No scores yet. Play a game!", 160, FONT, COLOR_UI)
+    else:
+        y = 150
+        for i, (name, score) in enumerate(scores, 1):
+            line = f"{i:2}. {name:<20}  {score} pts"
+            surf.blit(textcache.render(FONT, line, COLOR_UI), (WIDTH//2 - 200, y)); y += 30
+    draw_text_center(surf, "Press ESC to return   ·   H / F1 — Help", 420, FONT, COLOR_UI_DIM)
+    return surf
+
+def build_end_screen(title, name, score):
+    surf = pygame.Surface((WIDTH, HEIGHT))
+    draw_text_center(surf, title, 150, FONT_BIG, COLOR_UI_BRIGHT)
+    draw_text_center(surf, f"Score saved for {name}: {score} pts", 200, FONT, COLOR_UI)
+    draw_text_center(surf, "Press ENTER to return to menu", 260, FONT, COLOR_UI_DIM)
+    return surf
+
+def build_profile_overlay(_frames_bucket):
+    rows = [("phase", "p50", "p99 ms")]
+    rows += [(name, f"{p50:.2f}", f"{p99:.2f}") for name, (p50, p99) in PROFILER.summary().items()]
+    surf = pygame.Surface((210, 16*len(rows) + 8), pygame.SRCALPHA)
+    surf.fill((0,0,0,190))
+    for i, row in enumerate(rows):
+        y = 4 + 16*i
+        surf.blit(textcache.render(FONT_SMALL, row[0], COLOR_UI_BRIGHT), (6, y))
+        for text, right in zip(row[1:], (140, 204)):   # numbers right-aligned
+            t = textcache.render(FONT_SMALL, text, COLOR_UI_BRIGHT)
+            surf.blit(t, (right - t.get_width(), y))
+    return surf
+
+HUD        = Composite(build_hud)
+PROFILE_OVERLAY = Composite(build_profile_overlay)
+HELP_PANEL = Composite(build_help_panel)
+MENU_SCREEN   = Composite(build_menu)
+NAME_SCREEN   = Composite(build_name_entry)
+SCORES_SCREEN = Composite(build_scores)
+END_SCREEN    = Composite(build_end_screen)
+
+def draw_hud():
+    global hud_rect
+    rules = session.rules
+    builds = HUD.builds
+    rect = SCREEN.blit(HUD.get(rules.score, session.lives, rules.last_broken_msg), (0, 0))
+    if HUD.builds != builds:
+        DIRTY.add(rect.union(hud_rect))
+        hud_rect = rect
+
+def draw_help_overlay():
+    SCREEN.blit(HELP_PANEL.get(), (0, 0))
+
+def draw_profile_overlay():
+    """p50/p99 per phase, refreshed every 30 profiled frames (bottom-left)."""
+    surf = PROFILE_OVERLAY.get(PROFILER.count // 30)
+    DIRTY.add(SCREEN.blit(surf, (8, HEIGHT - surf.get_height() - 8)))
+
+def export_profile():
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, time.strftime("frames_%Y%m%d-%H%M%S"))
+    PROFILER.to_csv(base + ".csv")
+    PROFILER.to_chrome_trace(base + ".json")
+    print(f"[Profiler] {PROFILER.count} frames -> {base}.csv / .json")
 
 def apply_flash_and_shake(base_surface):
     """Blit base_surface to SCREEN with shake, then red flash overlay."""
-    global shake_frames, flash_frames
     # --- Shake ---
-    if shake_frames > 0:
-        strength = SHAKE_MAX_AMPL * (shake_frames / SHAKE_MAX_FRAMES)
+    if shake_ticks > 0:
+        strength = SHAKE_MAX_AMPL * (shake_ticks / SHAKE_TICKS)
         ox = int(random.uniform(-strength, strength))
         oy = int(random.uniform(-strength, strength))
         SCREEN.fill((0,0,0))
         SCREEN.blit(base_surface, (ox, oy))
-        shake_frames -= 1
     else:
         SCREEN.blit(base_surface, (0,0))
 
     # --- Flash (red screen) ---
-    if flash_frames > 0:
-        alpha = int(180 * (flash_frames / FLASH_MAX_FRAMES))
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((255, 40, 40, alpha))
-        SCREEN.blit(overlay, (0,0))
-        flash_frames -= 1
+    if flash_ticks > 0:
+        alpha = int(180 * (flash_ticks / FLASH_TICKS))
+        SCREEN.blit(SURFACES.tint((WIDTH, HEIGHT), (255, 40, 40), alpha), (0,0))
+
+def sim_tick(keys):
+    """One fixed simulation step with its sounds and effects; returns the next state."""
+    global flash_ticks, shake_ticks
+    flash_ticks = max(flash_ticks - 1, 0)
+    shake_ticks = max(shake_ticks - 1, 0)
+    if recorder:
+        recorder.record(keys_mask(keys))
+    events = session.step(keys)
+
+    if "pickup" in events:
+        play_sfx("pickup")
+    if "break" in events:
+        play_sfx("break")
+        # Start effects; they will be drawn after soft reset
+        flash_ticks = FLASH_TICKS
+        shake_ticks = SHAKE_TICKS
+    if session.status == PLAYING:
+        return STATE_PLAY
+    SCORES.add(player_name or "Player", session.rules.score)
+    stop_recording()
+    if session.status == WON:
+        play_sfx("win")
+        return STATE_WIN
+    return STATE_GAMEOVER
 
 # ---------------- Main loop ----------------
 running = True
+frame_dt = 0.0          # seconds since the previous frame
+sim_time = 0.0          # simulation time owed (accumulator)
 while running:
+    t = PROFILER.start()
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
+        elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+            DIRTY.invalidate()
+
+        # Profiler toggle / export
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            PROFILER.enabled = not PROFILER.enabled
+            DIRTY.invalidate()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+            export_profile()
 
         # Global help toggle
         if event.type == pygame.KEYDOWN and event.key in (pygame.K_h, pygame.K_F1):
@@ -318,126 +409,97 @@ while running:
             if event.key in (pygame.K_RETURN, pygame.K_SPACE, pygame.K_ESCAPE):
                 state = STATE_MENU
 
+    t = PROFILER.lap("events", t)
+
     # ---- States ----
+    # Static screens are redrawn (and presented) only when their inputs change
     if state == STATE_MENU:
-        if MENU_BG:
-            SCREEN.blit(MENU_BG, (0, 0))
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0,0,0,120)); SCREEN.blit(overlay, (0,0))
-        else:
-            SCREEN.fill((12,12,12))
-        draw_text_center(SCREEN, "Three Forbidden Acts", 80, FONT_BIG, COLOR_UI_BRIGHT)
-        for i, item in enumerate(menu_items):
-            color = COLOR_UI_BRIGHT if i == menu_index else COLOR_UI_DIM
-            draw_text_center(SCREEN, item, 170 + i*40, FONT, color)
-        if show_help:
-            draw_help_overlay()
+        if DIRTY.changed((state, show_help, menu_index)):
+            SCREEN.blit(MENU_SCREEN.get(menu_index), (0, 0))
+            if show_help:
+                draw_help_overlay()
 
     elif state == STATE_NAME:
-        SCREEN.fill((0,0,0))
-        draw_text_center(SCREEN, "Enter your name", 120, FONT_BIG, COLOR_UI_BRIGHT)
-        box_w = 360
-        box = pygame.Rect(WIDTH//2 - box_w//2, 200, box_w, 40)
-        pygame.draw.rect(SCREEN, (40,40,40), box, border_radius=6)
-        pygame.draw.rect(SCREEN, (120,120,120), box, width=2, border_radius=6)
-        name_surf = FONT.render(player_name or "_", True, COLOR_UI)
-        SCREEN.blit(name_surf, (box.x + 10, box.y + 8))
-        hint = FONT.render("Press ENTER to start   ·   H / F1 — Help", True, COLOR_UI_DIM)
-        SCREEN.blit(hint, (WIDTH//2 - hint.get_width()//2, 260))
-        if show_help:
-            draw_help_overlay()
+        if DIRTY.changed((state, show_help, player_name)):
+            SCREEN.blit(NAME_SCREEN.get(player_name), (0, 0))
+            if show_help:
+                draw_help_overlay()
 
     elif state == STATE_SCORES:
-        SCREEN.fill((0,0,0))
-        draw_text_center(SCREEN, "High Scores (Top 5)", 80, FONT_BIG, COLOR_UI_BRIGHT)
-        scores = load_scores()
-        if not scores:
-            draw_text_center(SCREEN, "No scores yet. Play a game!", 160, FONT, COLOR_UI)
-        else:
-            y = 150
-            for i, s in enumerate(scores[:MAX_SCORES], 1):
-                line = f"{i:2}. {s['name']:<20}  {s['score']} pts"
-                t = FONT.render(line, True, COLOR_UI)
-                SCREEN.blit(t, (WIDTH//2 - 200, y)); y += 30
-        draw_text_center(SCREEN, "Press ESC to return   ·   H / F1 — Help", 420, FONT, COLOR_UI_DIM)
-        if show_help:
-            draw_help_overlay()
+        top = tuple((s["name"], s["score"]) for s in SCORES.top(MAX_SCORES))
+        if DIRTY.changed((state, show_help, top)):
+            SCREEN.blit(SCORES_SCREEN.get(top), (0, 0))
+            if show_help:
+                draw_help_overlay()
 
     elif state == STATE_PLAY:
         # Draw world to offscreen then apply shake/flash
-        GAME_SURF = pygame.Surface((WIDTH, HEIGHT))
+        GAME_SURF = SURFACES.target("game", (WIDTH, HEIGHT))
 
+        # Run the ticks that are due (bounded catch-up when rendering lags behind)
         keys = pygame.key.get_pressed()
-        prev_score = rules.score
-
-        player.update(keys, rules, level)
-        for e in enemies:
-            e.update(level, player.rect)
-
-        # Rule 1: lava
-        if level.is_on_red(player.rect):
-            rules.break_rule(1, "Stepped on a lava tile.")
-
-        # Rule 2: any monster hits
-        if any(e.rect.colliderect(player.rect) for e in enemies):
-            rules.break_rule(2, "Caught by a Sentinel.")
-
-        # Rule 3: no camping
-        idle_frames = 0 if getattr(player, "moved_this_frame", False) else idle_frames + 1
-        if idle_frames > IDLE_LIMIT_FRAMES:
-            rules.break_rule(3, "Stayed still for too long.")
-
-        # Pickup SFX + difficulty ramp
-        if rules.score > prev_score:
-            play_sfx("pickup")
-            apply_enemy_speed()  # update speeds when score grows
-
-        # Handle penalties / lives -> trigger effects
-        if rules.any_broken():
-            play_sfx("break")
-            # Start effects; they will be drawn after soft reset
-            flash_frames = FLASH_MAX_FRAMES
-            shake_frames = SHAKE_MAX_FRAMES
-            reset_after_break()
-
-        # Win condition
-        if state == STATE_PLAY and level.touches_exit(player.rect):
-            play_sfx("win")
-            save_score(player_name or "Player", rules.score)
-            state = STATE_WIN
-
-        # Draw world onto GAME_SURF
+        sim_time += frame_dt
+        ticks = 0
+        while sim_time >= TICK_DT and state == STATE_PLAY:
+            if ticks == MAX_CATCHUP_TICKS:
+                sim_time = 0.0
+                break
+            t = PROFILER.lap("sim_other", t)
+            state = sim_tick(keys)          # session.step() laps player/enemy/rules itself
+            t = PROFILER.resume()
+            sim_time -= TICK_DT
+            ticks += 1
+        alpha = min(sim_time / TICK_DT, 1.0)
+        t = PROFILER.lap("sim_other", t)
+
+        # Draw the visible part of the world onto GAME_SURF
+        if camera.follow(session.player.draw_bounds(alpha)):
+            DIRTY.add_full()
         GAME_SURF.fill((0,0,0))
-        level.draw(GAME_SURF)
-        for e in enemies:
-            e.draw(GAME_SURF)
-        player.draw(GAME_SURF)
+        session.level.draw(GAME_SURF, camera)
+        t = PROFILER.lap("level_draw", t)
+        session.level.draw_actors(GAME_SURF, [*session.enemies, session.player], camera, alpha)
+        t = PROFILER.lap("actors_draw", t)
+
+        # Changed regions: repainted tiles, actors' old and new spots.
+        # Scrolling, shake and flash change the whole frame, so those go out in full.
+        DIRTY.changed((STATE_PLAY, show_help))
+        DIRTY.add_all(camera.to_screen(r) for r in session.level.take_dirty())
+        bounds = [camera.to_screen(a.draw_bounds(alpha)) for a in (session.player, *session.enemies)]
+        DIRTY.add_all(actor_bounds); DIRTY.add_all(bounds)
+        actor_bounds = bounds
+        effects_now = shake_ticks > 0 or flash_ticks > 0
+        if effects_now or effects_last:
+            DIRTY.add_full()
+        effects_last = effects_now
 
         # Present with effects to SCREEN
         apply_flash_and_shake(GAME_SURF)
+        t = PROFILER.lap("effects", t)
 
         # HUD and help overlay on top (not affected by shake)
         draw_hud()
         if show_help:
             draw_help_overlay()
-
-    elif state == STATE_WIN:
-        SCREEN.fill((0,0,0))
-        draw_text_center(SCREEN, "YOU WIN!", 150, FONT_BIG, COLOR_UI_BRIGHT)
-        draw_text_center(SCREEN, f"Score saved for {player_name or 'Player'}: {rules.score} pts", 200, FONT, COLOR_UI)
-        draw_text_center(SCREEN, "Press ENTER to return to menu", 260, FONT, COLOR_UI_DIM)
-        if show_help:
-            draw_help_overlay()
-
-    elif state == STATE_GAMEOVER:
-        SCREEN.fill((0,0,0))
-        draw_text_center(SCREEN, "GAME OVER", 150, FONT_BIG, COLOR_UI_BRIGHT)
-        draw_text_center(SCREEN, f"Score saved for {player_name or 'Player'}: {rules.score} pts", 200, FONT, COLOR_UI)
-        draw_text_center(SCREEN, "Press ENTER to return to menu", 260, FONT, COLOR_UI_DIM)
-        if show_help:
-            draw_help_overlay()
-
-    pygame.display.flip()
-    CLOCK.tick(60)
-
+        if PROFILER.enabled:
+            draw_profile_overlay()
+        t = PROFILER.lap("hud", t)
+
+    elif state in (STATE_WIN, STATE_GAMEOVER):
+        title = "YOU WIN!" if state == STATE_WIN else "GAME OVER"
+        end_inputs = (title, player_name or "Player", session.rules.score)
+        if DIRTY.changed((state, show_help) + end_inputs):
+            SCREEN.blit(END_SCREEN.get(*end_inputs), (0, 0))
+            if show_help:
+                draw_help_overlay()
+
+    DIRTY.present()
+    PROFILER.lap("present", t)
+    PROFILER.end_frame()
+    frame_dt = min(CLOCK.tick(MAX_FPS if state == STATE_PLAY else IDLE_FPS) / 1000.0, 0.25)
+
+stop_recording()
+SCORES.close()
+LEVEL_POOL.close()
+if PATH_PLANNER: PATH_PLANNER.close()
 pygame.quit()
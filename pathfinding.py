@@ -0,0 +1,229 @@
+import heapq
+import multiprocessing
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+INF = float("inf")
+
+# Grids are flat: tile (x, y) lives at index y*cols + x and walls[i] is truthy for a wall.
+
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+def _neighbours(i, cols, n):
+    x = i % cols
+    if x < cols - 1: yield i + 1
+    if x > 0:        yield i - 1
+    if i + cols < n: yield i + cols
+    if i >= cols:    yield i - cols
+
+def astar(cols, rows, walls, start_t, goal_t):
+    """Fresh A* search with a Manhattan heuristic. Returns [start, ..., goal] or []."""
+    n = cols * rows
+    sx, sy = start_t
+    gx, gy = goal_t
+    if not (0 <= sx < cols and 0 <= sy < rows and 0 <= gx < cols and 0 <= gy < rows):
+        return []
+    s, g = sy*cols + sx, gy*cols + gx
+    if walls[s] or walls[g]:
+        return []
+
+    prev = {s: -1}
+    cost = {s: 0}
+    # Ties on f go to the deeper node; on open maps that keeps the search on the path
+    open_ = [(manhattan(start_t, goal_t), 0, s)]
+    while open_:
+        _, neg_c, i = heapq.heappop(open_)
+        c = -neg_c
+        if i == g: break
+        if c > cost[i]: continue
+        for nb in _neighbours(i, cols, n):
+            if walls[nb]: continue
+            nc = c + 1
+            if nc < cost.get(nb, INF):
+                cost[nb] = nc
+                prev[nb] = i
+                h = abs(nb % cols - gx) + abs(nb // cols - gy)
+                heapq.heappush(open_, (nc + h, -nc, nb))
+
+    if g not in prev: return []
+    path, i = [], g
+    while i != -1:
+        path.append((i % cols, i // cols)); i = prev[i]
+    path.reverse()
+    return path
+
+
+def distance_field(cols, rows, walls, goal_t):
+    """Steps from every tile to goal_t (-1 = unreachable), walking around walls; one BFS."""
+    dist = [-1] * (cols * rows)
+    gx, gy = goal_t
+    if 0 <= gx < cols and 0 <= gy < rows and not walls[gy*cols + gx]:
+        g = gy*cols + gx
+        dist[g] = 0
+        q = deque([g])
+        while q:
+            i = q.popleft()
+            d = dist[i] + 1
+            x = i % cols
+            for n in (i+1 if x < cols-1 else -1, i-1 if x > 0 else -1,
+                      i+cols if i+cols < cols*rows else -1, i-cols):
+                if n >= 0 and dist[n] < 0 and not walls[n]:
+                    dist[n] = d
+                    q.append(n)
+    return dist
+
+def _field_job(cols, rows, walls, goal_t):
+    return array("i", distance_field(cols, rows, walls, goal_t))   # pickles as one buffer
+
+
+class FieldPlanner:
+    """
+    Distance fields computed off the main thread, for Level.next_step().
+
+    request(version, goal, ...) asks for the field of `goal` on grid `version`
+    (Level.grid_version, unique across levels, so one planner serves every run);
+    poll(version) returns the newest finished (goal, field) for that version
+    without ever waiting. A field serves every start tile, so requests are
+    keyed by (version, goal) alone: repeats of the key in flight, queued or
+    already delivered are dropped, and only the newest request waits behind
+    the one being computed (older queued ones are replaced). Results for an
+    older grid version are discarded when they land.
+
+    Runs on one forked worker process (a thread where fork is unavailable);
+    like LevelPool, create it before pygame so the fork carries no SDL state.
+    """
+
+    def __init__(self):
+        if "fork" in multiprocessing.get_all_start_methods():
+            self._executor = ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("fork"))
+        else:
+            self._executor = ThreadPoolExecutor(1)
+        self._executor.submit(int).result()      # fork the worker now, not mid-game
+        self._running = None    # ((version, goal), future)
+        self._queued = None     # ((version, goal), job args)
+        self._result = None     # (version, goal, field)
+        self.stats = {"requests": 0, "deduped": 0, "coalesced": 0, "stale": 0, "computed": 0}
+
+    def request(self, version, goal, walls, cols, rows):
+        key = (version, goal)
+        self.stats["requests"] += 1
+        if (self._result and self._result[:2] == key) or (self._running and self._running[0] == key) \
+                or (self._queued and self._queued[0] == key):
+            self.stats["deduped"] += 1
+            return
+        job = (cols, rows, bytes(walls), goal)
+        if self._running is None:
+            self._running = (key, self._executor.submit(_field_job, *job))
+        else:
+            if self._queued:
+                self.stats["coalesced"] += 1
+            self._queued = (key, job)
+
+    def poll(self, version):
+        """(goal, field) of the newest result for grid `version`, or None; never blocks."""
+        if self._running and self._running[1].done():
+            (v, goal), fut = self._running
+            self._running = None
+            try:
+                field = fut.result()
+            except Exception:
+                field = None                    # broken worker: the caller keeps its old field
+            if field is not None:
+                self.stats["computed"] += 1
+                if v == version:
+                    self._result = (v, goal, field)
+                else:
+                    self.stats["stale"] += 1
+            if self._queued:
+                key, job = self._queued
+                self._queued = None
+                if key[0] == version:
+                    self._running = (key, self._executor.submit(_field_job, *job))
+                else:
+                    self.stats["stale"] += 1
+        if self._result and self._result[0] == version:
+            return self._result[1:]
+        return None
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class IncrementalPlanner:
+    """
+    Keeps one monster's path alive between plans instead of searching again.
+
+    - monster moved along the path  -> drop the walked prefix
+    - player shifted by one tile    -> extend or cut back the tail of the path
+    - terrain changed on the path   -> A* detour around the blocked stretch only
+    Anything else (teleport, no path yet, too many splices) falls back to a
+    fresh A*. Splices can make the path a little longer than optimal, so a
+    fresh search is forced every `max_splices` tail edits.
+    """
+
+    def __init__(self, cols, rows, walls, max_splices=8):
+        self.cols, self.rows = cols, rows
+        self.walls = walls                  # shared with the level; read live
+        self.max_splices = max_splices
+        self.path = []
+        self._splices = 0
+        self.searches = 0                   # A* calls made (for benchmarks)
+
+    def _free(self, t):
+        x, y = t
+        return 0 <= x < self.cols and 0 <= y < self.rows and not self.walls[y*self.cols + x]
+
+    def _search(self, a, b):
+        self.searches += 1
+        return astar(self.cols, self.rows, self.walls, a, b)
+
+    def _replan(self, start_t, goal_t):
+        self.path = self._search(start_t, goal_t)
+        self._splices = 0
+
+    def _repair(self, changed):
+        """Route around changed tiles that now block the path."""
+        path, changed = self.path, set(changed)
+        i = 1
+        while i < len(path):
+            if path[i] in changed and not self._free(path[i]):
+                j = i + 1
+                while j < len(path) and not self._free(path[j]):
+                    j += 1
+                if j == len(path):
+                    return False            # the goal itself got walled in
+                detour = self._search(path[i-1], path[j])
+                if not detour:
+                    return False
+                path[i-1:j+1] = detour
+                i += len(detour) - 2        # detour ends on path[j]; resume right after it
+            i += 1
+        return True
+
+    def step(self, start_t, goal_t, changed=()):
+        """Next tile from start_t towards goal_t, or None."""
+        path = self.path
+        if path and start_t != path[0]:
+            if len(path) > 1 and start_t == path[1]:
+                path.pop(0)
+            else:
+                path = self.path = []
+        if changed and path and not self._repair(changed):
+            path = self.path = []
+
+        if path and goal_t != path[-1]:
+            if goal_t in path:
+                del path[path.index(goal_t) + 1:]   # player stepped back onto the path
+            elif manhattan(goal_t, path[-1]) == 1 and self._free(goal_t) \
+                    and self._splices < self.max_splices:
+                path.append(goal_t)
+                self._splices += 1
+            else:
+                path = self.path = []
+
+        if not path:
+            self._replan(start_t, goal_t)
+            path = self.path
+        return path[1] if len(path) > 1 else None
@@ -0,0 +1,101 @@
+"""
+Frame profiler: named phase timings per frame in a fixed-size ring buffer,
+p50/p99 summaries and CSV / Chrome trace-event export.
+
+Instrumented code chains laps, so each phase costs one call:
+
+    t = prof.start()
+    do_events();  t = prof.lap("events", t)
+    draw();       t = prof.lap("draw", t)
+
+When the profiler is disabled start() returns 0 and lap() returns at once,
+so leaving the hooks in costs a method call per phase.
+"""
+import csv
+import json
+from time import perf_counter
+
+class FrameProfiler:
+    def __init__(self, capacity: int = 600, enabled: bool = False):
+        self.capacity = capacity
+        self.enabled = enabled
+        self._frames = [None] * capacity    # ring of [(phase, t0, t1), ...]
+        self._next = 0
+        self.count = 0                      # frames recorded so far
+        self._cur = []
+        self._origin = perf_counter()
+
+    # ---- Hooks ----
+    def start(self) -> float:
+        return perf_counter() if self.enabled else 0.0
+
+    def lap(self, name: str, t0: float) -> float:
+        """Record phase `name` as t0..now; returns now for the next phase."""
+        if not t0:
+            return 0.0
+        t1 = perf_counter()
+        self._cur.append((name, t0, t1))
+        return t1
+
+    def resume(self) -> float:
+        """End of the last recorded lap (start() if none): chain on from it after
+        calling code that records its own laps, so phases never overlap."""
+        return self._cur[-1][2] if self._cur else self.start()
+
+    def end_frame(self):
+        if not self._cur:
+            return
+        self._frames[self._next] = self._cur
+        self._next = (self._next + 1) % self.capacity
+        self.count += 1
+        self._cur = []
+
+    def clear(self):
+        self._frames = [None] * self.capacity
+        self._next = self.count = 0
+        self._cur = []
+
+    # ---- Queries ----
+    def frames(self):
+        """Recorded frames, oldest first."""
+        ring = self._frames[self._next:] + self._frames[:self._next]
+        return [f for f in ring if f is not None]
+
+    def summary(self):
+        """{phase: (p50_ms, p99_ms)} over the buffer; a phase's laps within one frame are summed."""
+        per_phase = {}
+        frames = self.frames()
+        for frame in frames:
+            totals = {}
+            for name, t0, t1 in frame:
+                totals[name] = totals.get(name, 0.0) + (t1 - t0)
+            for name, d in totals.items():
+                per_phase.setdefault(name, []).append(d * 1000.0)
+        out = {}
+        for name, ds in per_phase.items():
+            ds += [0.0] * (len(frames) - len(ds))   # frames where the phase did not run
+            ds.sort()
+            out[name] = (ds[len(ds) // 2], ds[min(len(ds) - 1, int(len(ds) * 0.99))])
+        return out
+
+    # ---- Export ----
+    def to_csv(self, path: str):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["frame", "phase", "start_ms", "dur_ms"])
+            first = self.count - len(self.frames())
+            for i, frame in enumerate(self.frames(), first):
+                for name, t0, t1 in frame:
+                    w.writerow([i, name, f"{(t0 - self._origin) * 1000:.3f}", f"{(t1 - t0) * 1000:.3f}"])
+
+    def to_chrome_trace(self, path: str):
+        """Trace-event JSON for chrome://tracing or Perfetto (complete "X" events, microseconds)."""
+        events = [{"name": name, "ph": "X", "pid": 0, "tid": 0,
+                   "ts": round((t0 - self._origin) * 1e6, 1), "dur": round((t1 - t0) * 1e6, 1)}
+                  for frame in self.frames() for name, t0, t1 in frame]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+# Shared disabled instance for code paths that were not handed a profiler
+NULL_PROFILER = FrameProfiler(capacity=1)
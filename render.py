@@ -0,0 +1,104 @@
+import pygame
+
+class SurfacePool:
+    """
+    Render targets reused across frames instead of allocated per frame.
+
+    target(name, size) always hands back the same surface for the same
+    (name, size, flags); the caller overwrites it each frame. tint() is a
+    solid-colour overlay whose surface alpha is changed in place.
+    `stats` counts real allocations vs reuses.
+    """
+
+    def __init__(self):
+        self._surfs = {}
+        self.stats = {"allocations": 0, "reuses": 0}
+
+    def _get(self, key, make):
+        surf = self._surfs.get(key)
+        if surf is None:
+            surf = self._surfs[key] = make()
+            self.stats["allocations"] += 1
+        else:
+            self.stats["reuses"] += 1
+        return surf
+
+    def target(self, name: str, size, flags: int = 0) -> pygame.Surface:
+        size = tuple(size)
+        return self._get((name, size, flags), lambda: pygame.Surface(size, flags))
+
+    def tint(self, size, color, alpha: int) -> pygame.Surface:
+        """Opaque `color` fill at the given overall alpha (0..255)."""
+        size, color = tuple(size), tuple(color)
+        def make():
+            surf = pygame.Surface(size)
+            surf.fill(color)
+            return surf
+        surf = self._get(("tint", size, color), make)
+        surf.set_alpha(alpha)
+        return surf
+
+    def bytes_held(self) -> int:
+        return sum(s.get_bytesize() * s.get_width() * s.get_height() for s in self._surfs.values())
+
+    def clear(self):
+        self._surfs.clear()
+
+
+class DirtyRects:
+    """
+    Presents only the screen regions that changed this frame.
+
+    Callers add() changed rects while drawing; present() then calls
+    display.update(rects), a full flip after add_full(), or nothing when
+    the frame is identical to the last one. changed(key) is for screens that
+    are a pure function of key: it returns False (skip drawing) while the key
+    stays the same, and requests a full present when it changes.
+    With enabled=False every frame is a plain flip.
+    """
+
+    def __init__(self, size, enabled: bool = True):
+        self.bounds = pygame.Rect((0, 0), size)
+        self.enabled = enabled
+        self.rects = []
+        self.full = True
+        self._key = None
+        self.stats = {"full": 0, "partial": 0, "idle": 0}
+
+    def changed(self, key) -> bool:
+        if not self.enabled:
+            return True
+        if key == self._key:
+            return False
+        self._key = key
+        self.full = True
+        return True
+
+    def invalidate(self):
+        """Redraw and flip everything next frame (window exposed, mode change)."""
+        self._key = None
+        self.full = True
+
+    def add(self, rect):
+        r = self.bounds.clip(rect)
+        if r.width and r.height:
+            self.rects.append(r)
+
+    def add_all(self, rects):
+        for r in rects:
+            self.add(r)
+
+    def add_full(self):
+        self.full = True
+
+    def present(self):
+        if self.full or not self.enabled:
+            pygame.display.flip()
+            self.stats["full"] += 1
+        elif self.rects:
+            pygame.display.update(self.rects)
+            self.stats["partial"] += 1
+        else:
+            self.stats["idle"] += 1
+        self.rects.clear()
+        self.full = False
@@ -0,0 +1,197 @@
+"""
+Input replays: the level seed plus the arrow-key mask of every tick.
+
+File layout:
+  magic b"TFAR" | u16 version | u32 header length | JSON header {seed, cols, rows, tile}
+  (plus enemy_count / separation for stress-mode runs)
+  then run-length records until EOF, one per run of identical masks:
+    one byte  (run << 4) | mask            for runs of 1..15 ticks
+    byte mask, then LEB128 varint run      for longer runs
+
+A minute of play is typically well under a hundred bytes. Playback drives a
+GameSession with Keys.from_mask, so it is bit-exact and runs headless as fast
+as the CPU allows; Playback.seek() restores the nearest periodic snapshot and
+replays forward from there.
+
+    python replay.py FILE [--seek TICK]
+"""
+import json
+import struct
+import levelgen
+from session import GameSession, Keys, PLAYING, TILE
+
+MAGIC = b"TFAR"
+VERSION = 1
+PREFIX = struct.Struct("<4sHI")
+SNAPSHOT_EVERY = 600        # ticks between playback snapshots (10 s of play)
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+class ReplayWriter:
+    """Appends one mask per tick; identical consecutive masks cost nothing until they change."""
+
+    def __init__(self, path: str, seed, cols=levelgen.COLS, rows=levelgen.ROWS, tile=TILE,
+                 enemy_count=0, separation=False):
+        self.path = path
+        self.header = {"seed": seed, "cols": cols, "rows": rows, "tile": tile}
+        if enemy_count:
+            self.header.update(enemy_count=enemy_count, separation=separation)
+        blob = json.dumps(self.header).encode("utf-8")
+        self._f = open(path, "wb")
+        self._f.write(PREFIX.pack(MAGIC, VERSION, len(blob)) + blob)
+        self._mask, self._run = 0, 0
+        self.ticks = 0
+
+    def record(self, mask: int):
+        mask &= 15
+        if self._run and mask != self._mask:
+            self._flush()
+        self._mask = mask
+        self._run += 1
+        self.ticks += 1
+
+    def _flush(self):
+        if self._run <= 15:
+            self._f.write(bytes(((self._run << 4) | self._mask,)))
+        else:
+            self._f.write(bytes((self._mask,)) + _varint(self._run))
+        self._run = 0
+
+    def close(self):
+        if self._f.closed: return
+        if self._run:
+            self._flush()
+        self._f.close()
+
+
+class ReplayReader:
+    """Streams masks from a replay file in fixed-size chunks (never loads it whole)."""
+    CHUNK = 1 << 16
+
+    def __init__(self, path: str):
+        self._f = open(path, "rb")
+        magic, version, n = PREFIX.unpack(self._f.read(PREFIX.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a replay file (magic {magic!r}, version {version})")
+        self.header = json.loads(self._f.read(n).decode("utf-8"))
+        self._restart(self._f.tell(), 0, 0, 0)
+
+    def _restart(self, offset, mask, left, tick):
+        self._f.seek(offset)
+        self._base, self._buf, self._pos = offset, b"", 0
+        self._mask, self._left, self.tick = mask, left, tick
+
+    def _byte(self):
+        if self._pos >= len(self._buf):
+            self._base += len(self._buf)
+            self._buf, self._pos = self._f.read(self.CHUNK), 0
+            if not self._buf:
+                return None
+        b = self._buf[self._pos]
+        self._pos += 1
+        return b
+
+    def next_mask(self):
+        """Mask for the next tick, or None at the end of the recording."""
+        if not self._left:
+            b = self._byte()
+            if b is None:
+                return None
+            self._mask, run = b & 15, b >> 4
+            if not run:
+                shift = 0
+                while True:
+                    v = self._byte()
+                    if v is None: raise ValueError("replay truncated inside a run length")
+                    run |= (v & 0x7F) << shift
+                    shift += 7
+                    if not v & 0x80: break
+            self._left = run
+        self._left -= 1
+        self.tick += 1
+        return self._mask
+
+    def __iter__(self):
+        while (m := self.next_mask()) is not None:
+            yield m
+
+    def state(self):
+        """Resume point for restore(): (file offset, current mask, ticks left in run, tick)."""
+        return self._base + self._pos, self._mask, self._left, self.tick
+
+    def restore(self, state):
+        self._restart(*state)
+
+    def close(self):
+        self._f.close()
+
+
+class Playback:
+    """A GameSession driven by a replay, with snapshots every `snapshot_every` ticks for seek()."""
+
+    def __init__(self, path: str, snapshot_every: int = SNAPSHOT_EVERY):
+        self.reader = ReplayReader(path)
+        h = self.reader.header
+        self.session = GameSession(seed=h["seed"], tile_size=h["tile"], cols=h["cols"], rows=h["rows"],
+                                   enemy_count=h.get("enemy_count", 0), separation=h.get("separation", False))
+        self.snapshot_every = snapshot_every
+        self._snaps = [(0, self.session.snapshot(), self.reader.state())]
+
+    @property
+    def tick(self) -> int:
+        return self.reader.tick
+
+    def step(self):
+        """Advance one recorded tick; returns its events, or None at the end."""
+        mask = self.reader.next_mask()
+        if mask is None:
+            return None
+        events = self.session.step(Keys.from_mask(mask))
+        t = self.reader.tick
+        if t % self.snapshot_every == 0 and t > self._snaps[-1][0]:
+            self._snaps.append((t, self.session.snapshot(), self.reader.state()))
+        return events
+
+    def run(self, until=None):
+        """Play to tick `until` (or the end / the run being over); returns the session."""
+        while until is None or self.tick < until:
+            if self.step() is None or self.session.status != PLAYING:
+                break
+        return self.session
+
+    def seek(self, tick: int):
+        """Jump to `tick` from the nearest earlier snapshot."""
+        t, snap, state = max((s for s in self._snaps if s[0] <= tick), key=lambda s: s[0])
+        if not t <= self.tick <= tick:
+            self.session.restore(snap)
+            self.reader.restore(state)
+        return self.run(until=tick)
+
+    def close(self):
+        self.reader.close()
+
+
+if __name__ == "__main__":
+    import sys, time
+    args = sys.argv[1:]
+    if not args:
+        sys.exit(__doc__)
+    pb = Playback(args[0])
+    t0 = time.perf_counter()
+    if "--seek" in args:
+        pb.seek(int(args[args.index("--seek") + 1]))
+    s = pb.run() if "--seek" not in args else pb.session
+    dt = time.perf_counter() - t0
+    print(f"seed={pb.reader.header['seed']} ticks={pb.tick} status={s.status} "
+          f"score={s.rules.score} lives={s.lives}  ({pb.tick / max(dt, 1e-9):.0f} ticks/s)")
+    pb.close()
@@ -1,3 +1,11 @@
+# Tile codes (Level.map_data)
+FLOOR, WALL, LEMON, LAVA, EXIT = 0, 1, 2, 3, 4
+
+# Tile events, emitted by track() when an actor's tiles change:
+#   ENTER / LEAVE     the tile under the actor's centre (the tile it is "on")
+#   TOUCH / UNTOUCH   any tile its rect overlaps
+ENTER, LEAVE, TOUCH, UNTOUCH = "enter", "leave", "touch", "untouch"
+
 class Rules:
     """
     Run-time rule tracking.
@@ -13,13 +21,114 @@ class Rules:
     Lives / Penalties:
       - On any rule break, you lose one heart. If hearts remain, the run resets
         but the SCORE IS KEPT. On a brand-new run or after Game Over, score is 0.
+
+    Tile rules are event-driven: actors report their position through track()
+    after moving, and handlers run only when the tiles under them change.
+    TILE_RULES declares the built-in ones as (event, tile code, actor kind,
+    method name); subclasses extend the table and subscribe() adds handlers
+    at run time. A handler is called as handler(actor, (x, y), level).
     """
+    TILE_RULES = (
+        (ENTER,   LAVA,  "player", "_on_lava"),
+        (TOUCH,   EXIT,  "player", "_on_exit_touch"),
+        (UNTOUCH, EXIT,  "player", "_on_exit_untouch"),
+        (TOUCH,   LEMON, "player", "_on_lemon_touch"),
+        (UNTOUCH, LEMON, "player", "_on_lemon_untouch"),
+    )
+    RUN_FIELDS = ("score", "resets", "_broken", "last_broken_msg", "last_broken_rule")
 
     def __init__(self):
         self.score = 0
         self.resets = 0              # number of penalties (for stats if needed)
         self._broken = False
         self.last_broken_msg = ""
+        self.last_broken_rule = 0
+
+        self._handlers = {}          # (event, tile code, actor kind) -> [handler, ...]
+        for event, tile, kind, name in self.TILE_RULES:
+            self.subscribe(event, tile, getattr(self, name), kind)
+        self._lemons = set()         # lemon tiles the player overlaps (pickup candidates)
+        self._exits = set()          # exit tiles the player overlaps
+
+    # ---- Tile events ----
+    def subscribe(self, event, tile, handler, actor="player"):
+        """Call handler(actor, (x, y), level) on `event` for tiles with code `tile`."""
+        self._handlers.setdefault((event, tile, actor), []).append(handler)
+
+    def on(self, event, tile, actor="player"):
+        """Decorator form of subscribe()."""
+        def register(handler):
+            self.subscribe(event, tile, handler, actor)
+            return handler
+        return register
+
+    def wants(self, actor) -> bool:
+        """Whether any handler listens to actors of this kind (else track() can be skipped)."""
+        return any(k[2] == actor for k in self._handlers)
+
+    def _emit(self, event, kind, actor, tiles, level):
+        data, cols, handlers = level.map_data.data, level.cols, self._handlers
+        for (x, y) in tiles:
+            for h in handlers.get((event, data[y*cols + x], kind), ()):
+                h(actor, (x, y), level)
+
+    def track(self, actor, kind, level):
+        """Emit tile events for actor's move since its last track() (everything it is
+        on is new the first time, after untrack() and after terrain edits)."""
+        r = actor.rect
+        T = level.TILE
+        cx, cy = r.centerx // T, r.centery // T
+        centre = (cx, cy) if 0 <= cx < level.cols and 0 <= cy < level.rows else None
+        span = level.tile_range(r.left, r.top, r.right, r.bottom)
+        state = (centre, span, level.grid_version)
+        old = actor.tile_state
+        if old != state:
+            actor.tile_state = state
+            if old is None or old[2] != level.grid_version:
+                old = (None, (0, 0, -1, -1), None)
+            if old[0] != centre:
+                if old[0]: self._emit(LEAVE, kind, actor, (old[0],), level)
+                if centre: self._emit(ENTER, kind, actor, (centre,), level)
+            if old[1] != span:
+                before, after = _tiles(old[1]), _tiles(span)
+                self._emit(UNTOUCH, kind, actor, [t for t in before if t not in after], level)
+                self._emit(TOUCH, kind, actor, [t for t in after if t not in before], level)
+        if kind == "player" and self._lemons:
+            self._try_pickup(actor, level)
+
+    def untrack(self, actor):
+        """Forget actor's tiles (after a teleport or respawn) without emitting leave events."""
+        actor.tile_state = None
+
+    # ---- Built-in tile rules ----
+    def _on_lava(self, actor, xy, level):
+        self.break_rule(1, "Stepped on a lava tile.")
+
+    def _on_exit_touch(self, actor, xy, level):
+        self._exits.add(xy)
+
+    def _on_exit_untouch(self, actor, xy, level):
+        self._exits.discard(xy)
+
+    def _on_lemon_touch(self, actor, xy, level):
+        self._lemons.add(xy)
+
+    def _on_lemon_untouch(self, actor, xy, level):
+        self._lemons.discard(xy)
+
+    def _try_pickup(self, actor, level):
+        """First lemon (row-major) whose padded box the player overlaps, one per tick."""
+        for (x, y) in sorted(self._lemons, key=lambda t: (t[1], t[0])):
+            if not level.item_mask[y*level.cols + x]:
+                self._lemons.discard((x, y))
+            elif level.lemon_box_hit(actor.rect, x, y):
+                level.take_item(x, y)
+                self._lemons.discard((x, y))
+                self.on_item_picked()
+                return
+
+    def at_exit(self) -> bool:
+        return bool(self._exits)
 
     # ---- Events ----
     def on_item_picked(self):
@@ -27,6 +136,7 @@ class Rules:
 
     def break_rule(self, rule_number: int, msg: str):
         self._broken = True
+        self.last_broken_rule = rule_number
         self.last_broken_msg = f"Rule {rule_number} broken: {msg}"
 
     # ---- Helpers ----
@@ -37,3 +147,20 @@ class Rules:
         """Clear the broken flag/message after a soft reset. Score is kept."""
         self._broken = False
         self.last_broken_msg = ""
+        self._lemons.clear()
+        self._exits.clear()
+
+    def snapshot(self):
+        return {k: getattr(self, k) for k in self.RUN_FIELDS}
+
+    def restore(self, snap):
+        """Run fields from snapshot(); tile state is rebuilt by the next track() after untrack()."""
+        for k, v in snap.items():
+            setattr(self, k, v)
+        self._lemons.clear()
+        self._exits.clear()
+
+
+def _tiles(span):
+    x0, y0, x1, y1 = span
+    return [(x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
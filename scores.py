@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import queue
+import bisect
+import threading
+
+class ScoreStore:
+    """
+    High-score leaderboard kept sorted in memory.
+
+    Every new score is appended as one JSON line to `path` by a background
+    thread, so the game thread never touches the disk. After `compact_every`
+    appends the log is rewritten (atomically) with only the best `capacity`
+    entries. An old scores.json list is imported the first time.
+    """
+
+    def __init__(self, path="scores.log", legacy_path="scores.json",
+                 capacity=100_000, compact_every=500):
+        self.path = path
+        self.capacity = capacity
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._entries = []      # sorted by _key
+        self._by_name = {}      # name -> that player's entries, sorted by _key
+        self._seq = 0
+        self._appended = 0
+        self._compacted_to = 0  # entries with a lower _seq are already in the log
+        self._log = None        # append handle, owned by the writer thread
+        self._load(legacy_path)
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="score-writer", daemon=True)
+        self._writer.start()
+
+    # ---- Loading ----
+    def _load(self, legacy_path):
+        records = []
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try: records.append(json.loads(line))
+                        except ValueError: pass   # torn last line after a crash
+            except OSError: pass
+        elif legacy_path and os.path.exists(legacy_path):
+            try:
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    records = data
+                    self._appended = self.compact_every   # write the log on first add
+            except Exception: pass
+        for r in records:
+            if isinstance(r, dict) and "name" in r and "score" in r:
+                self._insert({"name": str(r["name"])[:20], "score": int(r["score"]),
+                              "ts": int(r.get("ts", 0))})
+        if len(self._entries) > self.capacity:
+            del self._entries[self.capacity:]
+            self._by_name = {}
+            for e in self._entries:             # already in _key order
+                self._by_name.setdefault(e["name"], []).append(e)
+
+    # ---- Index ----
+    def _key(self, e):
+        return (-e["score"], e["ts"], e["_seq"])
+
+    def _insert(self, e):
+        e["_seq"] = self._seq; self._seq += 1
+        bisect.insort(self._entries, e, key=self._key)
+        bisect.insort(self._by_name.setdefault(e["name"], []), e, key=self._key)
+
+    # ---- Public API ----
+    def add(self, name: str, score: int):
+        """Record a score; returns immediately (the disk write happens off-thread)."""
+        e = {"name": name[:20], "score": int(score), "ts": int(time.time())}
+        with self._lock:
+            self._insert(e)
+            if len(self._entries) > self.capacity:
+                dropped = self._entries.pop()
+                self._by_name[dropped["name"]].remove(dropped)
+        self._queue.put(e)
+        return e
+
+    def top(self, k: int):
+        """Best k entries, highest score first (ties: earlier first)."""
+        with self._lock:
+            return [self._public(e) for e in self._entries[:k]]
+
+    def for_player(self, name: str, k: int = 10):
+        """That player's best k entries."""
+        with self._lock:
+            return [self._public(e) for e in self._by_name.get(name[:20], [])[:k]]
+
+    def rank(self, score: int) -> int:
+        """1-based leaderboard position a score would take."""
+        with self._lock:
+            return bisect.bisect_right(self._entries, (-score, float("inf"), 0), key=self._key) + 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def flush(self):
+        """Block until every queued write is on disk."""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+
+    @staticmethod
+    def _public(e):
+        return {"name": e["name"], "score": e["score"], "ts": e["ts"]}
+
+    # ---- Writer thread ----
+    def _write_loop(self):
+        while True:
+            e = self._queue.get()
+            try:
+                if e is None:
+                    if self._log: self._log.close()
+                    return
+                self._append(e)
+                if self._log and self._queue.qsize() == 0:
+                    self._log.flush()
+            except OSError as err:
+                print(f"[Scores] write failed: {err}")
+            finally:
+                self._queue.task_done()
+
+    def _append(self, e):
+        if e["_seq"] < self._compacted_to:
+            return
+        self._appended += 1
+        if self._appended >= self.compact_every:
+            self._compact()
+            return
+        if self._log is None:
+            self._log = open(self.path, "a", encoding="utf-8")
+        self._log.write(json.dumps(self._public(e), ensure_ascii=False) + "\n")
+
+    def _compact(self):
+        """Rewrite the log as the current (already capped) leaderboard."""
+        with self._lock:
+            lines = [json.dumps(self._public(e), ensure_ascii=False) + "\n" for e in self._entries]
+            self._compacted_to = self._seq
+        if self._log:
+            self._log.close(); self._log = None
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp, self.path)
+        self._appended = 0
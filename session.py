@@ -0,0 +1,257 @@
+import random
+import pygame
+import levelgen
+from player import Player
+from rules import Rules
+from level import Level
+from enemy import Enemy, HITBOX_SIZE as ENEMY_HITBOX
+from entities import ActorStore
+from pathfinding import IncrementalPlanner
+from spatial import SpatialHash
+from profiler import NULL_PROFILER
+
+# ---------------- Gameplay config ----------------
+TILE = 32
+PLAYER_SPEED = 2
+ENEMY_SPEED  = 2            # base speed; will ramp up with score
+IDLE_LIMIT_FRAMES = 120
+MAX_LIVES = 3
+ENEMY_SPAWNS = ((15, 3), (4, 11))   # tiles
+STRESS_SPAWN_CLEARANCE = 6          # stress-mode monsters spawn at least this many tiles (Manhattan) from the start
+
+# Session status
+PLAYING, WON, LOST = "playing", "won", "lost"
+
+ENEMY_SPEED_RAMP = 0.2     # monster speed added ...
+RAMP_EVERY = 5             # ... per this many points
+
+# Difficulty knobs; GameSession(tuning={...}) overrides any of them (sweep.py varies them)
+TUNING = {
+    "enemy_speed": ENEMY_SPEED, "speed_ramp": ENEMY_SPEED_RAMP, "ramp_every": RAMP_EVERY,
+    "idle_limit": IDLE_LIMIT_FRAMES, "max_lives": MAX_LIVES,
+    "lava": levelgen.LAVA_DENSITY, "lemons": levelgen.LEMON_DENSITY,
+}
+
+def current_enemy_speed(score: int, base: float = ENEMY_SPEED, ramp: float = ENEMY_SPEED_RAMP,
+                        every: int = RAMP_EVERY) -> float:
+    """Base speed plus +ramp for every `every` points."""
+    return base + ramp * (score // every)
+
+
+# Arrow keys as bits 0..3 of a compact input mask (batch env, replays)
+ARROWS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+LEFT, RIGHT, UP, DOWN = 1, 2, 4, 8
+
+class Keys:
+    """Stand-in for pygame.key.get_pressed() when driving a session without a window."""
+    __slots__ = ("down",)
+
+    def __init__(self, *down):
+        self.down = frozenset(down)
+
+    def __getitem__(self, key):
+        return key in self.down
+
+    @classmethod
+    def from_mask(cls, mask: int) -> "Keys":
+        return _MASK_KEYS[mask & 15]
+
+def keys_mask(keys) -> int:
+    """Arrow-key state of keys (Keys or get_pressed()) as a LEFT|RIGHT|UP|DOWN mask."""
+    return sum(1 << i for i, k in enumerate(ARROWS) if keys[k])
+
+_MASK_KEYS = [Keys(*(k for i, k in enumerate(ARROWS) if m >> i & 1)) for m in range(16)]
+NO_KEYS = _MASK_KEYS[0]
+
+
+class GameSession:
+    """
+    One run of the game without display, fonts, mixer or clock.
+
+    step(keys) advances exactly one tick: player, enemies, the three rules,
+    lives and win/lose. It returns the events of that tick so a front-end can
+    play sounds and effects:
+      "pickup", "break", "win", "gameover"
+    """
+
+    def __init__(self, seed=None, tile_size: int = TILE, map_data=None,
+                 cols: int = levelgen.COLS, rows: int = levelgen.ROWS, field_planner=None,
+                 enemy_count: int = 0, separation: bool = False, tuning=None):
+        self.tile = tile_size
+        unknown = set(tuning or ()) - set(TUNING)
+        if unknown:
+            raise ValueError(f"unknown tuning keys: {', '.join(sorted(unknown))}")
+        self.tuning = {**TUNING, **(tuning or {})}
+        self.cols, self.rows = cols, rows     # size of generated maps (map_data brings its own)
+        # Stress mode: enemy_count monsters on seeded free tiles instead of the fixed
+        # pair; separation keeps them from stacking (Enemy.move with the crowd hash)
+        self.enemy_count = enemy_count
+        self.separation = separation
+        self.crowd = SpatialHash(tile_size)   # monsters by tile, for catches and separation
+        # Monster state lives in flat columns; respawns rewrite the rows in place
+        self.enemy_store = ActorStore(Enemy, ENEMY_HITBOX, tile_size)
+        self.profiler = NULL_PROFILER         # a FrameProfiler to time step()'s phases
+        # A pathfinding.FieldPlanner moves the enemies' shared BFS off this thread; the
+        # tick a field lands on then varies, so such runs are not replay-exact
+        self.field_planner = field_planner
+        self.new_run(seed, map_data)
+
+    # ---- Lifecycle ----
+    def new_run(self, seed=None, map_data=None):
+        """Fresh run on the layout for seed (or a pre-generated map_data from a LevelPool)."""
+        self.level = Level(tile_size=self.tile, seed=seed, map_data=map_data,
+                           cols=self.cols, rows=self.rows,
+                           lava=self.tuning["lava"], lemons=self.tuning["lemons"])
+        self.level.field_planner = self.field_planner
+        self.rules = Rules()            # score resets on brand-new run
+        self.player = Player(self.level.start_x, self.level.start_y, speed=PLAYER_SPEED)
+        self.enemies = self._spawn_enemies()
+        self.idle_frames = 0
+        self.lives = self.tuning["max_lives"]
+        self.status = PLAYING
+        self.ticks = 0
+
+    @property
+    def enemies(self):
+        return self._enemies
+
+    @enemies.setter
+    def enemies(self, enemies):
+        self._enemies = enemies
+        self.crowd.clear()
+        for e in enemies:
+            self.crowd.add(e)
+
+    def _spawn_tiles(self):
+        if not self.enemy_count:
+            return ENEMY_SPAWNS
+        lv = self.level
+        sx, sy = lv.start_tile
+        data, cols = lv.map_data.data, lv.cols
+        free = [(i % cols, i // cols) for i in range(len(data)) if data[i] in (0, 2)
+                and abs(i % cols - sx) + abs(i // cols - sy) >= STRESS_SPAWN_CLEARANCE]
+        rnd = random.Random(lv.seed)
+        if len(free) >= self.enemy_count:
+            return rnd.sample(free, self.enemy_count)
+        return [rnd.choice(free) for _ in range(self.enemy_count)] if free else []
+
+    def _enemy_speed(self):
+        t = self.tuning
+        return current_enemy_speed(self.rules.score, t["enemy_speed"], t["speed_ramp"], t["ramp_every"])
+
+    def _spawn_enemies(self):
+        spd = self._enemy_speed()
+        T = self.tile
+        return self.enemy_store.respawn([(T*tx, T*ty) for (tx, ty) in self._spawn_tiles()], spd, "field")
+
+    def _lose_life(self, events):
+        """Lose a heart; soft-reset world if hearts remain, else Game Over."""
+        self.lives -= 1
+        if self.lives > 0:
+            self.rules.reset_run_state()           # keep score
+            self.level.reset_run_state()
+            self.player.reset_position(self.level.start_x, self.level.start_y)
+            self.rules.untrack(self.player)
+            self.enemies = self._spawn_enemies()
+            self.idle_frames = 0
+        else:
+            self.status = LOST
+            events.append("gameover")
+
+    # ---- Snapshots (replay seeking) ----
+    def snapshot(self):
+        """Everything step() depends on, as plain data. Terrain edits (Level.set_tile)
+        are not captured; sessions never make them."""
+        lv, p = self.level, self.player
+        return {
+            "ticks": self.ticks, "status": self.status, "lives": self.lives,
+            "idle_frames": self.idle_frames,
+            "rules": self.rules.snapshot(),
+            "items": bytes(lv.item_mask),
+            "player": (p.pos, p.prev_pos, p.moved_this_frame, p.speed),
+            "enemies": [(e.pos, e.prev_pos, e.next_tile, e.speed, e.planner,
+                         (list(e.incr.path), e.incr._splices) if e.incr else None,
+                         e.log_pos) for e in self.enemies],
+        }
+
+    def restore(self, snap):
+        """Return to a snapshot() taken on this session's level."""
+        self.ticks, self.status = snap["ticks"], snap["status"]
+        self.lives, self.idle_frames = snap["lives"], snap["idle_frames"]
+        self.rules.restore(snap["rules"])
+
+        lv = self.level
+        lv.item_mask[:] = snap["items"]
+        lv.items_left = lv.item_mask.count(1)
+        lv._picked_cells.clear()
+        lv._chunks.clear()
+
+        p = self.player
+        p.pos, p.prev_pos, p.moved_this_frame, p.speed = snap["player"]
+        self.rules.untrack(p)
+
+        rows = snap["enemies"]
+        enemies = self.enemy_store.respawn([pos for pos, *_ in rows], 0.0)
+        for e, (pos, prev, nxt, speed, planner, incr, log_pos) in zip(enemies, rows):
+            e.prev_pos, e.next_tile, e.speed, e.planner, e.log_pos = prev, nxt, speed, planner, log_pos
+            if incr:
+                e.incr = IncrementalPlanner(lv.cols, lv.rows, lv.wall_mask)
+                e.incr.path, e.incr._splices = list(incr[0]), incr[1]
+        self.enemies = enemies
+
+    # ---- Tick ----
+    def step(self, keys=NO_KEYS):
+        events = []
+        if self.status != PLAYING:
+            return events
+        self.ticks += 1
+        rules, level, player = self.rules, self.level, self.player
+        prof = self.profiler
+        prev_score = rules.score
+
+        t = prof.start()
+        player.update(keys, rules, level)
+        t = prof.lap("player", t)
+        crowd = self.crowd
+        mover_crowd = crowd if self.separation else None
+        track_enemies = rules.wants("enemy")
+        player_rect = player.rect
+        for e in self.enemies:
+            e.plan(level, player_rect)
+            t = prof.lap("enemy_plan", t)
+            e.move(level, mover_crowd)
+            crowd.update(e)
+            if track_enemies:
+                rules.track(e, "enemy", level)
+            t = prof.lap("enemy_move", t)
+
+        if level.terrain_log:       # drop edits every incremental planner has consumed
+            level.trim_terrain_log(self.enemy_store.oldest_log_pos(level.terrain_pos))
+
+        # Rule 1 (lava), pickups and reaching the exit run on the player's tile
+        # events, from player.update() -> rules.track()
+
+        # Rule 2: any monster hits
+        if any(e.rect.colliderect(player_rect) for e in crowd.query(player_rect)):
+            rules.break_rule(2, "Caught by a Sentinel.")
+
+        # Rule 3: no camping
+        self.idle_frames = 0 if player.moved_this_frame else self.idle_frames + 1
+        if self.idle_frames > self.tuning["idle_limit"]:
+            rules.break_rule(3, "Stayed still for too long.")
+
+        # Difficulty ramp
+        if rules.score > prev_score:
+            events.append("pickup")
+            self.enemy_store.set_speed(self._enemy_speed())   # one column write for every monster
+
+        if rules.any_broken():
+            events.append("break")
+            self._lose_life(events)
+
+        # Win condition
+        if self.status == PLAYING and rules.at_exit():
+            self.status = WON
+            events.append("win")
+        prof.lap("rules", t)
+        return events
@@ -0,0 +1,65 @@
+"""
+Uniform-grid spatial hash (broad phase) for actors with a pygame.Rect `.rect`.
+
+Buckets are keyed by the (cx, cy) cell of the given size (the tile size in
+the game), and an actor sits in every cell its rect overlaps. update() after
+a move only touches buckets when the actor's cell span changed, which for
+monsters stepping a few pixels per tick is rare. query() returns candidates
+from the buckets under a rect; callers still run the exact colliderect.
+"""
+
+class SpatialHash:
+    def __init__(self, cell: int):
+        self.cell = cell
+        self._buckets = {}      # (cx, cy) -> list of actors
+        self._spans = {}        # id(actor) -> (actor, (x0, y0, x1, y1)) inclusive cell span
+
+    def _span(self, rect):
+        c = self.cell
+        return rect.left // c, rect.top // c, (rect.right - 1) // c, (rect.bottom - 1) // c
+
+    def _cells(self, span):
+        x0, y0, x1, y1 = span
+        return [(x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+
+    def __len__(self):
+        return len(self._spans)
+
+    def add(self, actor):
+        span = self._span(actor.rect)
+        self._spans[id(actor)] = (actor, span)
+        for key in self._cells(span):
+            self._buckets.setdefault(key, []).append(actor)
+
+    def remove(self, actor):
+        _, span = self._spans.pop(id(actor))
+        for key in self._cells(span):
+            bucket = self._buckets[key]
+            bucket.remove(actor)
+            if not bucket:
+                del self._buckets[key]
+
+    def update(self, actor):
+        """Re-bucket actor after its rect moved (no-op while it stays in the same cells)."""
+        if self._spans[id(actor)][1] != self._span(actor.rect):
+            self.remove(actor)
+            self.add(actor)
+
+    def clear(self):
+        self._buckets.clear()
+        self._spans.clear()
+
+    def query(self, rect):
+        """Actors sharing a cell with rect, each once (in first-seen order)."""
+        buckets = self._buckets
+        x0, y0, x1, y1 = self._span(rect)
+        if x0 == x1 and y0 == y1:
+            return list(buckets.get((x0, y0), ()))
+        seen, out = set(), []
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                for a in buckets.get((x, y), ()):
+                    if id(a) not in seen:
+                        seen.add(id(a))
+                        out.append(a)
+        return out
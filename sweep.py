@@ -0,0 +1,341 @@
+"""
+Difficulty-balancing sweep: a grid of session.TUNING values played by a
+scripted bot over many seeds, headless, on every core.
+
+Every combination of the grid values plays the same seeds (paired runs).
+Work goes out in chunks of --chunk seeds of one combination; each finished
+chunk is appended to a columnar store in OUT, one flat binary file per
+column (one row per run):
+
+  combo, seed, status (0 timeout, 1 won, 2 lost), score, ticks,
+  lives (left), lost_lava, lost_caught, lost_idle (hearts lost per rule)
+
+then recorded in OUT/done.log as "chunk rows". Rerunning the same command
+resumes: columns are cut back to the last logged row count and finished
+chunks are skipped. OUT/sweep.json holds the grid; OUT/summary.csv the
+per-combination aggregates (win rate, mean score, mean ticks to finish,
+hearts lost by cause), rebuilt at the end or with --summary.
+
+    python sweep.py OUT [-p NAME=V1,V2,...]... [--seeds N] [--seed0 S] [--chunk K]
+                        [--max-ticks T] [--workers W]
+    python sweep.py OUT --summary
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import sys
+import json
+import time
+import itertools
+import multiprocessing
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from batch import STATUS_PLAYING, STATUS_WON, STATUS_LOST
+from rules import FLOOR, LEMON, EXIT
+from session import GameSession, TUNING, PLAYING, WON, LEFT, RIGHT, UP, DOWN, Keys, NO_KEYS
+
+COLUMNS = (("combo", "I"), ("seed", "q"), ("status", "b"), ("score", "i"), ("ticks", "i"),
+           ("lives", "b"), ("lost_lava", "b"), ("lost_caught", "b"), ("lost_idle", "b"))
+CAUSES = ("lost_lava", "lost_caught", "lost_idle")     # by rule number 1..3
+DONE_LOG = "done.log"
+META = "sweep.json"
+SUMMARY = "summary.csv"
+DEFAULTS = {"seeds": 1000, "seed0": 0, "chunk": 50, "max_ticks": 6000}
+PROGRESS_S = 5.0                # seconds between progress lines
+
+# ---- Bot ----
+class GreedyBot:
+    """Scripted player: walks tile to tile along the shortest path to the nearest
+    lemon, or to the exit once the lemons are gone or a monster is within `wary`
+    tiles. Paths avoid lava and the tiles next to monsters (ignoring the
+    monsters when they block every path). Always moving, so it never camps."""
+
+    def __init__(self, session, wary: int = 3):
+        self.session = session
+        self.wary = wary
+        self.goal = None            # pixel top-left of the tile being walked to
+
+    def _safe_step(self, level, start, avoid, lemons):
+        """Second tile of a BFS path from start to the nearest lemon (or the exit), or None."""
+        cols, rows, data = level.cols, level.rows, level.map_data.data
+        items = level.item_mask
+        prev = {start: None}
+        q = deque([start])
+        while q:
+            cur = q.popleft()
+            x, y = cur
+            i = y*cols + x
+            if cur != start and (items[i] if lemons else data[i] == EXIT):
+                while prev[cur] != start:
+                    cur = prev[cur]
+                return cur
+            for nxt in ((x+1, y), (x-1, y), (x, y+1), (x, y-1)):
+                nx, ny = nxt
+                if 0 <= nx < cols and 0 <= ny < rows and nxt not in prev and nxt not in avoid:
+                    t = data[ny*cols + nx]
+                    if t == FLOOR or t == LEMON or t == EXIT:
+                        prev[nxt] = cur
+                        q.append(nxt)
+        return None
+
+    def _plan(self, x, y):
+        s = self.session
+        level, T = s.level, s.tile
+        me = (x // T, y // T)
+        avoid, nearest = set(), None
+        for e in s.enemies:
+            ex, ey = e.pos
+            tx, ty = (ex + T//2) // T, (ey + T//2) // T
+            d = abs(tx - me[0]) + abs(ty - me[1])
+            nearest = d if nearest is None else min(nearest, d)
+            avoid.update(((tx, ty), (tx+1, ty), (tx-1, ty), (tx, ty+1), (tx, ty-1)))
+            if e.next_tile is not None:
+                avoid.add(e.next_tile)
+        avoid.discard(me)
+        lemons = level.items_left > 0 and (nearest is None or nearest > self.wary)
+        nxt = self._safe_step(level, me, avoid, lemons) or self._safe_step(level, me, (), lemons)
+        if nxt is None:
+            nxt = level.next_step(me, level.finish_tile) or me
+        self.goal = (nxt[0]*T, nxt[1]*T)
+
+    def keys(self):
+        x, y = self.session.player.pos
+        T = self.session.tile
+        goal = self.goal
+        # New waypoint on arrival, and after a soft reset moved the player away
+        if goal is None or (x, y) == goal or abs(goal[0] - x) + abs(goal[1] - y) > T:
+            if x % T or y % T:
+                return NO_KEYS
+            self._plan(x, y)
+            goal = self.goal
+        gx, gy = goal
+        mask = RIGHT if gx > x else LEFT if gx < x else DOWN if gy > y else UP if gy < y else 0
+        return Keys.from_mask(mask)
+
+
+def play(seed, tuning, max_ticks):
+    """One bot run; returns its row (without the combo column)."""
+    s = GameSession(seed=seed, tuning=tuning)
+    bot = GreedyBot(s)
+    lost = [0, 0, 0]
+    while s.status == PLAYING and s.ticks < max_ticks:
+        if "break" in s.step(bot.keys()):
+            lost[s.rules.last_broken_rule - 1] += 1
+    status = STATUS_WON if s.status == WON else STATUS_PLAYING if s.status == PLAYING else STATUS_LOST
+    return (seed, status, s.rules.score, s.ticks, s.lives, *lost)
+
+def _chunk_job(chunk, combo, tuning, seeds, max_ticks):
+    return chunk, [(combo, *play(seed, tuning, max_ticks)) for seed in seeds]
+
+# ---- Store ----
+def _col_path(out, name):
+    return os.path.join(out, name + ".bin")
+
+def load(out):
+    """Per-run columns of a sweep as {name: numpy array}."""
+    with open(os.path.join(out, DONE_LOG), "r", encoding="utf-8") as f:
+        rows = _logged(f)[1]
+    return {name: np.fromfile(_col_path(out, name), dtype=np.dtype(tc), count=rows)
+            for name, tc in COLUMNS}
+
+def _logged(lines):
+    """(finished chunk ids, row count) from done.log lines; a torn last line is ignored."""
+    done, rows = set(), 0
+    for line in lines:
+        parts = line.split()
+        if not line.endswith("\n") or len(parts) != 2:
+            break
+        done.add(int(parts[0])); rows = int(parts[1])
+    return done, rows
+
+class ColumnWriter:
+    """Appends row batches to the column files; commit() makes them durable and logs
+    the chunk. Reopening cuts every column back to the last logged row count."""
+
+    def __init__(self, out):
+        log_path = os.path.join(out, DONE_LOG)
+        if os.path.exists(log_path):
+            with open(log_path, "r", encoding="utf-8") as f:
+                self.done, self.rows = _logged(f)
+        else:
+            self.done, self.rows = set(), 0
+        self._files = []
+        for name, tc in COLUMNS:
+            path = _col_path(out, name)
+            f = open(path, "r+b" if os.path.exists(path) else "w+b")
+            f.truncate(self.rows * array(tc).itemsize)
+            f.seek(0, os.SEEK_END)
+            self._files.append(f)
+        # Rewrite the log without a torn tail before appending to it
+        with open(log_path + ".tmp", "w", encoding="utf-8") as f:
+            if os.path.exists(log_path):
+                with open(log_path, "r", encoding="utf-8") as old:
+                    for line in itertools.islice(old, len(self.done)):
+                        f.write(line)
+        os.replace(log_path + ".tmp", log_path)
+        self._log = open(log_path, "a", encoding="utf-8")
+
+    def commit(self, chunk, rows):
+        for k, ((_, tc), f) in enumerate(zip(COLUMNS, self._files)):
+            array(tc, [r[k] for r in rows]).tofile(f)
+        for f in self._files:
+            f.flush()
+            os.fsync(f.fileno())
+        self.rows += len(rows)
+        self.done.add(chunk)
+        self._log.write(f"{chunk} {self.rows}\n")
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def close(self):
+        for f in self._files:
+            f.close()
+        self._log.close()
+
+# ---- Sweep ----
+def combos(grid):
+    """Every combination of the grid values as tuning dicts, first key slowest."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+def _executor(workers):
+    ctx = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+    return ProcessPoolExecutor(workers, mp_context=ctx)
+
+def run(out, meta, workers=None):
+    """Play every (combination, seed) of meta not yet in OUT; resumable at chunk granularity."""
+    tunings = combos(meta["grid"])
+    seeds, seed0, chunk = meta["seeds"], meta["seed0"], meta["chunk"]
+    blocks = -(-seeds // chunk)
+    total = len(tunings) * blocks
+    writer = ColumnWriter(out)
+    todo = (c for c in range(total) if c not in writer.done)
+    if not workers:
+        workers = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    start_rows, t0, last = writer.rows, time.perf_counter(), 0.0
+    print(f"{len(tunings)} combinations x {seeds} seeds on {workers} workers; "
+          f"{len(writer.done)}/{total} chunks already done", flush=True)
+    pool = _executor(workers)
+    pending = set()
+    try:
+        while True:
+            # Keep a couple of chunks per worker in flight
+            for c in itertools.islice(todo, 2*workers - len(pending)):
+                combo, block = divmod(c, blocks)
+                block_seeds = range(seed0 + block*chunk, seed0 + min(seeds, (block + 1)*chunk))
+                pending.add(pool.submit(_chunk_job, c, combo, tunings[combo], block_seeds, meta["max_ticks"]))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                writer.commit(*fut.result())
+            now = time.perf_counter()
+            if now - last >= PROGRESS_S:
+                last = now
+                rate = (writer.rows - start_rows) / max(now - t0, 1e-9)
+                left = (total - len(writer.done)) * chunk / max(rate, 1e-9)
+                print(f"{len(writer.done)}/{total} chunks  {writer.rows} runs  "
+                      f"{rate:.0f} runs/s  ~{left/60:.1f} min left", flush=True)
+    except KeyboardInterrupt:
+        print("interrupted; rerun the same command to resume", flush=True)
+        raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        writer.close()
+
+def summarize(out, meta):
+    """Aggregates per combination from the run columns; writes OUT/summary.csv."""
+    cols = load(out)
+    tunings = combos(meta["grid"])
+    n = np.bincount(cols["combo"], minlength=len(tunings))
+    won = cols["status"] == STATUS_WON
+    def per_combo(values):
+        return np.bincount(cols["combo"], weights=values, minlength=len(tunings))
+    wins = per_combo(won)
+    stats = {
+        "runs": n,
+        "win_rate": wins / np.maximum(n, 1),
+        "mean_score": per_combo(cols["score"]) / np.maximum(n, 1),
+        "mean_ticks_won": per_combo(np.where(won, cols["ticks"], 0)) / np.maximum(wins, 1),
+        "timeouts": per_combo(cols["status"] == STATUS_PLAYING),
+    }
+    for cause in CAUSES:
+        stats[cause + "_per_run"] = per_combo(cols[cause]) / np.maximum(n, 1)
+    names = list(meta["grid"])
+    with open(os.path.join(out, SUMMARY), "w", encoding="utf-8") as f:
+        f.write(",".join(names + list(stats)) + "\n")
+        for i, t in enumerate(tunings):
+            f.write(",".join([str(t[k]) for k in names] + [f"{stats[k][i]:.6g}" for k in stats]) + "\n")
+    return tunings, stats
+
+# ---- CLI ----
+def _value(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def _meta(argv):
+    grid = {}
+    for i, arg in enumerate(argv):
+        if arg == "-p":
+            name, _, values = argv[i + 1].partition("=")
+            if name not in TUNING:
+                sys.exit(f"unknown parameter {name!r}; one of: {', '.join(TUNING)}")
+            grid[name] = [_value(v) for v in values.split(",") if v]
+    meta = {"grid": grid}
+    for key, default in DEFAULTS.items():
+        flag = "--" + key.replace("_", "-")
+        meta[key] = int(argv[argv.index(flag) + 1]) if flag in argv else default
+    return meta
+
+def main(argv):
+    if not argv or argv[0].startswith("-"):
+        sys.exit(__doc__)
+    out, argv = argv[0], argv[1:]
+    meta_path = os.path.join(out, META)
+    stored = None
+    if os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+
+    if "--summary" in argv:
+        if stored is None:
+            sys.exit(f"no sweep in {out}")
+        meta = stored
+    else:
+        meta = _meta(argv)
+        given = meta["grid"] or any("--" + k.replace("_", "-") in argv for k in DEFAULTS)
+        if stored is not None:
+            # Bare "sweep.py OUT" resumes; a spelled-out sweep must match the stored one
+            if given and meta != stored:
+                sys.exit(f"{out} holds a different sweep ({meta_path}); use another directory")
+            meta = stored
+        os.makedirs(out, exist_ok=True)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1)
+        workers = int(argv[argv.index("--workers") + 1]) if "--workers" in argv else None
+        try:
+            run(out, meta, workers)
+        except KeyboardInterrupt:
+            return 130
+
+    tunings, stats = summarize(out, meta)
+    names = list(meta["grid"])
+    print(f"\n{' '.join(f'{k:>11}' for k in names)} {'runs':>8} {'win%':>6} {'score':>6} "
+          f"{'ticks':>7} {'lava':>5} {'caught':>6} {'idle':>5}")
+    for i, t in enumerate(tunings):
+        print(f"{' '.join(f'{t[k]:>11}' for k in names)} {int(stats['runs'][i]):>8} "
+              f"{100*stats['win_rate'][i]:6.1f} {stats['mean_score'][i]:6.2f} "
+              f"{stats['mean_ticks_won'][i]:7.0f} {stats['lost_lava_per_run'][i]:5.2f} "
+              f"{stats['lost_caught_per_run'][i]:6.2f} {stats['lost_idle_per_run'][i]:5.2f}")
+    print(f"\nsummary written to {os.path.join(out, SUMMARY)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
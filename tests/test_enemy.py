@@ -0,0 +1,23 @@
+import random
+
+from session import GameSession, Keys, LEFT, RIGHT, UP, DOWN
+
+STUCK_TICKS = 120
+
+
+def test_separated_monsters_never_hold_a_blocked_tile():
+    session = GameSession(seed=1, cols=64, rows=64, enemy_count=20, separation=True,
+                          tuning={"idle_limit": 10**9})
+    session.rules.break_rule = lambda *args: None       # no catches: keep the pack together
+    rnd = random.Random(0)
+    keys = Keys()
+    stuck = [0] * len(session.enemies)
+    for tick in range(1500):
+        if tick % 20 == 0:
+            keys = Keys.from_mask(rnd.choice((LEFT, RIGHT, UP, DOWN)))
+        before = [e.pos for e in session.enemies]
+        session.step(keys)
+        for i, e in enumerate(session.enemies):
+            held = e.pos == before[i] and e.next_tile is not None
+            stuck[i] = stuck[i] + 1 if held else 0
+            assert stuck[i] < STUCK_TICKS, f"monster {i} stuck at {e.pos} on its way to {e.next_tile}"
@@ -0,0 +1,18 @@
+from pathfinding import IncrementalPlanner
+
+
+def test_repair_routes_around_every_new_wall():
+    cols, rows = 9, 5
+    walls = bytearray(cols * rows)
+    planner = IncrementalPlanner(cols, rows, walls)
+    planner.step((0, 2), (8, 2))
+    assert planner.path == [(x, 2) for x in range(9)]
+
+    for x, y in ((3, 2), (5, 2)):
+        walls[y*cols + x] = 1
+    planner.step((0, 2), (8, 2), [(3, 2), (5, 2)])
+
+    path = planner.path
+    assert path[0] == (0, 2) and path[-1] == (8, 2)
+    assert not any(walls[y*cols + x] for x, y in path)
+    assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:]))
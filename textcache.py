@@ -0,0 +1,49 @@
+import pygame
+from collections import OrderedDict
+
+MAX_TEXTS = 256         # rendered strings kept; least recently used evicted first
+
+_texts = OrderedDict()  # (font, text, color) -> Surface
+stats = {"renders": 0, "hits": 0, "evictions": 0}
+
+def render(font: pygame.font.Font, text: str, color, antialias: bool = True) -> pygame.Surface:
+    """font.render(text, antialias, color), cached. Treat the result as read-only."""
+    key = (font, text, tuple(color), antialias)
+    surf = _texts.get(key)
+    if surf is not None:
+        _texts.move_to_end(key)
+        stats["hits"] += 1
+        return surf
+    surf = font.render(text, antialias, color)
+    stats["renders"] += 1
+    _texts[key] = surf
+    if len(_texts) > MAX_TEXTS:
+        _texts.popitem(last=False)
+        stats["evictions"] += 1
+    return surf
+
+def clear():
+    _texts.clear()
+
+
+class Composite:
+    """
+    A whole surface (a screen, a panel) built by build(*inputs) and rebuilt
+    only when get() is called with different inputs.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.inputs = None
+        self.surf = None
+        self.builds = 0
+
+    def get(self, *inputs) -> pygame.Surface:
+        if self.surf is None or inputs != self.inputs:
+            self.surf = self.build(*inputs)
+            self.inputs = inputs
+            self.builds += 1
+        return self.surf
+
+    def invalidate(self):
+        self.surf = None
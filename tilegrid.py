@@ -0,0 +1,79 @@
+"""
+Compact tile storage: one byte per tile in a flat row-major buffer, plus a
+binary level file that is memory-mapped instead of parsed.
+
+File layout (little-endian):
+  magic b"TFAL" | u16 version | u16 reserved | u32 cols | u32 rows | cols*rows tile bytes
+"""
+import mmap
+import struct
+
+MAGIC = b"TFAL"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+
+class TileGrid:
+    """
+    cols x rows tile codes in a bytearray (or a mapped file) exposed through a
+    memoryview. grid[y] is a writable row view, so grid[y][x] reads and
+    assigns like the old list-of-lists map_data; flat code should index
+    grid.data[y*cols + x] directly.
+    """
+    __slots__ = ("cols", "rows", "data", "_mmap")
+
+    def __init__(self, cols: int, rows: int, data=None):
+        self.cols, self.rows = cols, rows
+        self._mmap = None
+        if data is None:
+            data = bytearray(cols * rows)
+        self.data = memoryview(data).cast("B")
+        if len(self.data) != cols * rows:
+            raise ValueError(f"grid buffer has {len(self.data)} bytes, expected {cols}x{rows}")
+
+    @classmethod
+    def from_rows(cls, rows) -> "TileGrid":
+        """From a list of equal-length rows of ints (levelgen output)."""
+        return cls(len(rows[0]), len(rows), bytearray(t for row in rows for t in row))
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.rows:
+            raise IndexError(y)
+        c = self.cols
+        return self.data[y*c:(y+1)*c]
+
+    def __iter__(self):
+        c = self.cols
+        return (self.data[i:i+c] for i in range(0, self.rows*c, c))
+
+    def mask(self, *tiles) -> bytearray:
+        """1 where the tile is one of tiles, else 0 (translated in C, no per-cell objects)."""
+        table = bytes(1 if t in tiles else 0 for t in range(256))
+        return bytearray(self.data).translate(table)
+
+    def to_rows(self):
+        return [list(row) for row in self]
+
+    def nbytes(self) -> int:
+        return len(self.data)
+
+    # ---- Binary file ----
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, self.cols, self.rows))
+            f.write(self.data)
+
+    @classmethod
+    def load(cls, path: str) -> "TileGrid":
+        """Map a saved level copy-on-write: O(1) load, edits never reach the file."""
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, _, cols, rows = HEADER.unpack_from(mm)
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            raise ValueError(f"{path}: not a level file (magic {magic!r}, version {version})")
+        grid = cls(cols, rows, memoryview(mm)[HEADER.size:HEADER.size + cols*rows])
+        grid._mmap = mm
+        return grid